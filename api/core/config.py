@@ -2,83 +2,141 @@
 Application configuration settings for Azure Functions
 """
 
+import json
 import os
-from pydantic_settings import BaseSettings
-from typing import List
+from dataclasses import dataclass
+from functools import cache
+from typing import Tuple
 
 
-class Settings(BaseSettings):
-    """Application settings for Azure Functions"""
-    
+def _env_str(name: str, default: str) -> str:
+    """Read a string App Setting"""
+    return os.environ.get(name, default)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer App Setting"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float App Setting"""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Read a boolean App Setting ("true"/"1"/"yes" are truthy)"""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("true", "1", "yes", "on")
+
+
+@dataclass(frozen=True)
+class AzureOpenAIConnection:
+    """One Azure OpenAI endpoint/deployment in the connection pool"""
+
+    endpoint: str
+    api_key: str
+    deployment_name: str
+    api_version: str = "2024-02-15-preview"
+    max_concurrency: int = 4
+
+
+def _env_connections(name: str) -> Tuple[AzureOpenAIConnection, ...]:
+    """Read a JSON list of Azure OpenAI connections from an App Setting"""
+    value = os.environ.get(name)
+    if not value:
+        return ()
+    return tuple(AzureOpenAIConnection(**entry) for entry in json.loads(value))
+
+
+@dataclass(frozen=True)
+class AzureSettings:
+    """Azure Functions specific settings using Azure App Settings"""
+
     # App Info
     app_name: str = "Matrix AI Converter"
     app_version: str = "2.1.0"
     app_description: str = "Neural Network-powered Excel to JSON conversion service"
-    
-    # File Processing
-    max_file_size: int = 10 * 1024 * 1024  # 10MB
-    allowed_extensions: List[str] = [".xlsx", ".xls", ".csv"]
-    
+
+    # File Processing - Read from Azure App Settings
+    max_file_size: int = 10485760  # 10MB
+    allowed_extensions: Tuple[str, ...] = (".xlsx", ".xls", ".csv")
+
     # AI Settings
     default_confidence_threshold: float = 0.8
     ai_enabled: bool = True
-    
+
     # Logging
     log_level: str = "INFO"
-    
-    # Azure OpenAI Configuration
+
+    # Azure OpenAI Configuration - Read from Azure App Settings
     azure_openai_endpoint: str = ""
     azure_openai_api_key: str = ""
     azure_openai_api_version: str = "2024-02-15-preview"
     azure_openai_deployment_name: str = "gpt-4"
     azure_openai_model: str = "gpt-4"
-    
+
+    # Extra endpoints/deployments to spread AI calls across (AZURE_OPENAI_POOL,
+    # JSON list of AzureOpenAIConnection fields); empty uses the single one above
+    azure_openai_pool: Tuple[AzureOpenAIConnection, ...] = ()
+    azure_openai_max_concurrency: int = 4
+    ai_rate_limit_cooldown: float = 10.0
+
     # AI Processing Settings
     ai_max_tokens: int = 4000
     ai_temperature: float = 0.3
     ai_timeout: int = 30
-    
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
 
+    # Cache of model responses for repeated prompts (0 entries disables it)
+    ai_prompt_cache_size: int = 128
+    ai_prompt_cache_ttl: float = 3600.0
 
-class AzureSettings(BaseSettings):
-    """Azure Functions specific settings using Azure App Settings"""
-    
-    # App Info
-    app_name: str = "Matrix AI Converter"
-    app_version: str = "2.1.0"
-    app_description: str = "Neural Network-powered Excel to JSON conversion service"
-    
-    # File Processing - Read from Azure App Settings
-    max_file_size: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
-    allowed_extensions: List[str] = [".xlsx", ".xls", ".csv"]
-    
-    # AI Settings
-    default_confidence_threshold: float = float(os.getenv("DEFAULT_CONFIDENCE_THRESHOLD", "0.8"))
-    ai_enabled: bool = os.getenv("AI_ENABLED", "true").lower() == "true"
-    
-    # Logging
-    log_level: str = os.getenv("LOG_LEVEL", "INFO")
-    
-    # Azure OpenAI Configuration - Read from Azure App Settings
-    azure_openai_endpoint: str = os.getenv("AZURE_OPENAI_ENDPOINT", "")
-    azure_openai_api_key: str = os.getenv("AZURE_OPENAI_API_KEY", "")
-    azure_openai_api_version: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
-    azure_openai_deployment_name: str = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4")
-    azure_openai_model: str = os.getenv("AZURE_OPENAI_MODEL", "gpt-4")
-    
-    # AI Processing Settings
-    ai_max_tokens: int = int(os.getenv("AI_MAX_TOKENS", "4000"))
-    ai_temperature: float = float(os.getenv("AI_TEMPERATURE", "0.3"))
-    ai_timeout: int = int(os.getenv("AI_TIMEOUT", "30"))
+    # AI request micro-batching
+    ai_batch_max_size: int = 8
+    ai_batch_max_wait_ms: int = 20
 
-
-# Global settings instances
-settings = Settings()
+    @classmethod
+    def from_environment(cls) -> "AzureSettings":
+        """Build settings from Azure App Settings (environment variables)"""
+        return cls(
+            max_file_size=_env_int("MAX_FILE_SIZE", cls.max_file_size),
+            default_confidence_threshold=_env_float(
+                "DEFAULT_CONFIDENCE_THRESHOLD", cls.default_confidence_threshold
+            ),
+            ai_enabled=_env_bool("AI_ENABLED", cls.ai_enabled),
+            log_level=_env_str("LOG_LEVEL", cls.log_level),
+            azure_openai_endpoint=_env_str("AZURE_OPENAI_ENDPOINT", cls.azure_openai_endpoint),
+            azure_openai_api_key=_env_str("AZURE_OPENAI_API_KEY", cls.azure_openai_api_key),
+            azure_openai_api_version=_env_str("AZURE_OPENAI_API_VERSION", cls.azure_openai_api_version),
+            azure_openai_deployment_name=_env_str(
+                "AZURE_OPENAI_DEPLOYMENT_NAME", cls.azure_openai_deployment_name
+            ),
+            azure_openai_model=_env_str("AZURE_OPENAI_MODEL", cls.azure_openai_model),
+            azure_openai_pool=_env_connections("AZURE_OPENAI_POOL"),
+            azure_openai_max_concurrency=_env_int(
+                "AZURE_OPENAI_MAX_CONCURRENCY", cls.azure_openai_max_concurrency
+            ),
+            ai_rate_limit_cooldown=_env_float("AI_RATE_LIMIT_COOLDOWN", cls.ai_rate_limit_cooldown),
+            ai_max_tokens=_env_int("AI_MAX_TOKENS", cls.ai_max_tokens),
+            ai_temperature=_env_float("AI_TEMPERATURE", cls.ai_temperature),
+            ai_timeout=_env_int("AI_TIMEOUT", cls.ai_timeout),
+            ai_prompt_cache_size=_env_int("AI_PROMPT_CACHE_SIZE", cls.ai_prompt_cache_size),
+            ai_prompt_cache_ttl=_env_float("AI_PROMPT_CACHE_TTL", cls.ai_prompt_cache_ttl),
+            ai_batch_max_size=_env_int("AI_BATCH_MAX_SIZE", cls.ai_batch_max_size),
+            ai_batch_max_wait_ms=_env_int("AI_BATCH_MAX_WAIT_MS", cls.ai_batch_max_wait_ms),
+        )
 
 
+@cache
 def get_azure_settings() -> AzureSettings:
-    """Get Azure Functions settings from environment variables"""
-    return AzureSettings()
+    """
+    Get Azure Functions settings from environment variables
+
+    The instance is built once per worker process; call
+    ``get_azure_settings.cache_clear()`` to force a re-read.
+    """
+    return AzureSettings.from_environment()
@@ -26,20 +26,45 @@ EMOJI_PATTERNS = {
     "🔢": "INFO:"
 }
 
+
+def build_emoji_regex(patterns):
+    """
+    Build a trie-shaped regex matching every pattern in one scan
+    
+    Patterns are grouped by their first code point, so each position in the
+    text costs a single character-class test instead of one test per pattern.
+    """
+    suffixes_by_head = {}
+    for emoji in patterns:
+        suffixes_by_head.setdefault(emoji[0], []).append(emoji[1:])
+    
+    plain_heads = []
+    branches = []
+    for head, suffixes in suffixes_by_head.items():
+        if suffixes == [""]:
+            plain_heads.append(re.escape(head))
+        else:
+            tails = "|".join(re.escape(tail) for tail in sorted(suffixes, key=len, reverse=True))
+            branches.append(f"{re.escape(head)}(?:{tails})")
+    
+    if plain_heads:
+        branches.append(f"[{''.join(plain_heads)}]")
+    return re.compile("|".join(branches))
+
+
+EMOJI_RE = build_emoji_regex(EMOJI_PATTERNS)
+
 def fix_file(filepath):
     """Remove emojis from a file"""
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        original_content = content
-        
         # Replace emojis with text prefixes
-        for emoji, replacement in EMOJI_PATTERNS.items():
-            content = content.replace(emoji, replacement)
+        content, replacements = EMOJI_RE.subn(lambda m: EMOJI_PATTERNS[m.group(0)], content)
         
         # Write back if changed
-        if content != original_content:
+        if replacements:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
             print(f"Fixed emojis in: {filepath}")
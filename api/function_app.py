@@ -3,22 +3,24 @@ Azure Functions - Matrix AI Converter
 Neural Network-powered Excel to JSON conversion service
 """
 
+import asyncio
 import azure.functions as func
-import logging
+import base64
 import json
-import os
-from typing import Optional
+import orjson
+import re
+import shutil
+import tempfile
+from typing import TYPE_CHECKING
+from urllib.parse import quote
 
 # Import our existing modules (we'll adapt these)
 from core.config import get_azure_settings
 from utils.logger import setup_azure_logger
-from services.converter_service import ConverterService
-from models.responses import (
-    HealthResponse, 
-    RootResponse, 
-    ConversionResponse, 
-    ErrorResponse
-)
+from utils.timestamps import utc_now_iso
+
+if TYPE_CHECKING:
+    from services.converter_service import ConverterService
 
 # Initialize the Function App
 app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
@@ -26,28 +28,145 @@ app = func.FunctionApp(http_auth_level=func.AuthLevel.ANONYMOUS)
 # Setup logging for Azure Functions
 logger = setup_azure_logger()
 
-# Initialize services
-converter_service = ConverterService()
+# Conversion service is created on first use so health/info/formats
+# requests don't pay for importing pandas, openpyxl and openai
+_converter_service = None
+
+
+def _enable_pandas_copy_on_write() -> None:
+    """
+    Turn on pandas Copy-on-Write for the whole process
+    
+    The conversion services modify shallow copies (``df.copy(deep=False)``
+    followed by column or ``.loc`` assignment) and rely on Copy-on-Write to
+    leave the caller's frame untouched. It is always on from pandas 3.0,
+    where the option is deprecated, so it is only set on older versions.
+    """
+    import pandas as pd
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+
+
+def _get_converter_service() -> "ConverterService":
+    """Get the shared ConverterService, importing and creating it on first call"""
+    global _converter_service
+    if _converter_service is None:
+        _enable_pandas_copy_on_write()
+        from services.converter_service import ConverterService
+        _converter_service = ConverterService()
+    return _converter_service
+
+# CORS headers shared by every response (never mutated)
+_CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization",
+    "Content-Type": "application/json"
+}
+
+_XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Static payload for the formats endpoint, serialized once at load
+_FORMATS_JSON = orjson.dumps({
+    "supported_input_formats": [".xlsx", ".xls", ".csv"],
+    "supported_output_formats": ["json", "excel", "sql"],
+    "max_file_size_mb": 10,
+    "features": {
+        "ai_analysis": True,
+        "batch_processing": False,
+        "custom_sheets": True
+    }
+})
+
+
+def _error_json(error: str, error_code: str) -> bytes:
+    """Serialize an error payload with the same shape as ErrorResponse"""
+    return orjson.dumps({
+        "error": error,
+        "status": "ERROR",
+        "error_code": error_code,
+        "details": None,
+        "timestamp": utc_now_iso()
+    })
+
+
+# Conversion rows can carry numpy scalars and non-string column labels
+_CONVERSION_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _orjson_default(obj):
+    """Serialize values orjson doesn't handle natively (Pydantic models, timestamps)"""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
 
-# CORS headers helper
-def get_cors_headers():
-    """Get CORS headers for all responses"""
+
+# Characters that can't appear in a quoted header filename: controls
+# (including CR/LF), quotes and backslashes
+_UNSAFE_FILENAME_RE = re.compile(r'[\x00-\x1f\x7f"\\]')
+
+
+def _content_disposition(filename: str) -> str:
+    """
+    Attachment header for a user-supplied filename (RFC 6266)
+    
+    An ASCII-only fallback goes in ``filename`` and the full name, percent-
+    encoded as UTF-8, in ``filename*``.
+    """
+    cleaned = _UNSAFE_FILENAME_RE.sub('', filename) or "converted_data.xlsx"
+    fallback = cleaned.encode('ascii', 'ignore').decode('ascii').strip() or "converted_data.xlsx"
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(cleaned, safe='')}"
+
+
+def _parse_convert_params(params) -> dict:
+    """Read excel-to-json query parameters, applying defaults"""
+    max_rows = params.get('max_rows')
     return {
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type, Authorization",
-        "Content-Type": "application/json"
+        "use_ai": params.get('use_ai', 'true').lower() == 'true',
+        "min_confidence": float(params.get('min_confidence') or 0.8),
+        "sheet_name": params.get('sheet_name'),
+        "skip_rows": int(params.get('skip_rows') or 0),
+        "max_rows": int(max_rows) if max_rows else None,
+        "orient": params.get('orient') or 'records'
     }
 
 
+def _parse_sql_params(params) -> dict:
+    """Read excel-to-sql query parameters, applying defaults"""
+    return {
+        "table_name": params.get('table_name', 'converted_data'),
+        "include_create_table": params.get('include_create_table', 'true').lower() == 'true',
+        "include_inserts": params.get('include_inserts', 'true').lower() == 'true',
+        "batch_size": int(params.get('batch_size') or 100),
+        "load_format": params.get('load_format') or 'insert'
+    }
+
+
+# Uploads larger than this spill from memory to a temporary file
+_UPLOAD_SPOOL_MAX_SIZE = 1024 * 1024
+
+# Copy uploads in large chunks so a spilled spool needs few read/write calls
+_UPLOAD_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _spool_upload(file) -> tempfile.SpooledTemporaryFile:
+    """Copy an uploaded file's stream into a spooled buffer, rewound for reading"""
+    buffer = tempfile.SpooledTemporaryFile(max_size=_UPLOAD_SPOOL_MAX_SIZE)
+    shutil.copyfileobj(file.stream, buffer, _UPLOAD_COPY_CHUNK_SIZE)
+    buffer.seek(0)
+    return buffer
+
+
 # OPTIONS handler for CORS preflight
 @app.route(route="{*route}", methods=["OPTIONS"])
 def handle_options(req: func.HttpRequest) -> func.HttpResponse:
     """Handle CORS preflight requests"""
     return func.HttpResponse(
-        "",
+        b"",
         status_code=200,
-        headers=get_cors_headers()
+        headers=_CORS_HEADERS
     )
 
 
@@ -59,27 +178,24 @@ def health_check(req: func.HttpRequest) -> func.HttpResponse:
     try:
         logger.info("Health check performed")
         
-        response = HealthResponse(
-            status="ONLINE",
-            neural_network="ACTIVE",
-            ai_engine="READY"
-        )
+        response = orjson.dumps({
+            "status": "ONLINE",
+            "neural_network": "ACTIVE",
+            "ai_engine": "READY",
+            "timestamp": utc_now_iso()
+        })
         
         return func.HttpResponse(
-            response.model_dump_json(),
+            response,
             status_code=200,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
-        error_response = ErrorResponse(
-            error="Health check failed",
-            error_code="HEALTH_CHECK_ERROR"
-        )
+        logger.error("Health check failed: %s", e)
         return func.HttpResponse(
-            error_response.model_dump_json(),
+            _error_json("Health check failed", "HEALTH_CHECK_ERROR"),
             status_code=500,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
 
 
@@ -93,28 +209,24 @@ def root(req: func.HttpRequest) -> func.HttpResponse:
         
         settings = get_azure_settings()
         
-        response = RootResponse(
-            error="🔋MATRIX AI CONVERTER - NEURAL NETWORK ONLINE",
-            status="ACTIVE", 
-            version=settings.app_version,
-            protocols=["EXCEL→JSON", "JSON→EXCEL", "EXCEL→SQL"]
-        )
+        response = orjson.dumps({
+            "message": "🔋 MATRIX AI CONVERTER - NEURAL NETWORK ONLINE",
+            "status": "ACTIVE",
+            "version": settings.app_version,
+            "protocols": ["EXCEL→JSON", "JSON→EXCEL", "EXCEL→SQL"]
+        })
         
         return func.HttpResponse(
-            response.model_dump_json(),
+            response,
             status_code=200,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
     except Exception as e:
-        logger.error(f"Root endpoint failed: {str(e)}")
-        error_response = ErrorResponse(
-            error="Service unavailable",
-            error_code="SERVICE_ERROR"
-        )
+        logger.error("Root endpoint failed: %s", e)
         return func.HttpResponse(
-            error_response.model_dump_json(),
+            _error_json("Service unavailable", "SERVICE_ERROR"),
             status_code=500,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
 
 
@@ -137,20 +249,16 @@ def app_info(req: func.HttpRequest) -> func.HttpResponse:
         }
         
         return func.HttpResponse(
-            json.dumps(info),
+            orjson.dumps(info),
             status_code=200,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
     except Exception as e:
-        logger.error(f"Info endpoint failed: {str(e)}")
-        error_response = ErrorResponse(
-            error="Info unavailable",
-            error_code="INFO_ERROR"
-        )
+        logger.error("Info endpoint failed: %s", e)
         return func.HttpResponse(
-            error_response.model_dump_json(),
+            _error_json("Info unavailable", "INFO_ERROR"),
             status_code=500,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
 
 
@@ -166,59 +274,49 @@ async def convert_excel_to_json(req: func.HttpRequest) -> func.HttpResponse:
         # Get file from request
         files = req.files
         if not files or 'file' not in files:
-            error_response = ErrorResponse(
-                error="No file provided",
-                error_code="NO_FILE_PROVIDED"
-            )
             return func.HttpResponse(
-                error_response.model_dump_json(),
+                _error_json("No file provided", "NO_FILE_PROVIDED"),
                 status_code=400,
-                headers=get_cors_headers()
+                headers=_CORS_HEADERS
             )
         
         file = files['file']
         
-        # Get parameters from form data or query params
-        use_ai = req.params.get('use_ai', 'true').lower() == 'true'
-        min_confidence = float(req.params.get('min_confidence', '0.8'))
-        sheet_name = req.params.get('sheet_name')
-        skip_rows = int(req.params.get('skip_rows', '0'))
-        max_rows = req.params.get('max_rows')
-        max_rows = int(max_rows) if max_rows else None
+        # Parse parameters before spooling, so a bad value can't leave the
+        # spooled upload unclosed
+        params = _parse_convert_params(req.params)
         
-        # Process the conversion
-        result = await converter_service.convert_excel_to_json(
-            file_content=file.read(),
-            filename=file.filename,
-            use_ai=use_ai,
-            min_confidence=min_confidence,
-            sheet_name=sheet_name,
-            skip_rows=skip_rows,
-            max_rows=max_rows
-        )
+        # Spool the upload in a worker thread, then process the conversion
+        with await asyncio.to_thread(_spool_upload, file) as file_content:
+            result = await _get_converter_service().convert_excel_to_json(
+                file_content=file_content,
+                filename=file.filename,
+                **params
+            )
         
-        response = ConversionResponse(
-            status=result.get('status', 'SUCCESS'),
-            data=result.get('data', []),
-            metadata=result.get('metadata', {})
+        response = orjson.dumps(
+            {
+                "status": result.get('status', 'SUCCESS'),
+                "data": result.get('data', []),
+                "metadata": result.get('metadata', {}),
+                "timestamp": utc_now_iso()
+            },
+            default=_orjson_default,
+            option=_CONVERSION_JSON_OPTIONS
         )
         
         return func.HttpResponse(
-            response.model_dump_json(),
+            response,
             status_code=200,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
         
     except Exception as e:
-        logger.error(f"Conversion failed: {str(e)}")
-        error_response = ErrorResponse(
-            error=f"Conversion failed: {str(e)}",
-            error_code="CONVERSION_ERROR"
-        )
+        logger.error("Conversion failed: %s", e)
         return func.HttpResponse(
-            error_response.model_dump_json(),
+            _error_json(f"Conversion failed: {str(e)}", "CONVERSION_ERROR"),
             status_code=500,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
 
 
@@ -230,33 +328,18 @@ def get_formats(req: func.HttpRequest) -> func.HttpResponse:
     try:
         logger.info("📋 Formats endpoint accessed")
         
-        formats = {
-            "supported_input_formats": [".xlsx", ".xls", ".csv"],
-            "supported_output_formats": ["json", "excel", "sql"],
-            "max_file_size_mb": 10,
-            "features": {
-                "ai_analysis": True,
-                "batch_processing": False,
-                "custom_sheets": True
-            }
-        }
-        
         return func.HttpResponse(
-            json.dumps(formats),
+            _FORMATS_JSON,
             status_code=200,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
         
     except Exception as e:
-        logger.error(f"Formats endpoint failed: {str(e)}")
-        error_response = ErrorResponse(
-            error="Could not retrieve formats",
-            error_code="FORMATS_ERROR"
-        )
+        logger.error("Formats endpoint failed: %s", e)
         return func.HttpResponse(
-            error_response.model_dump_json(),
+            _error_json("Could not retrieve formats", "FORMATS_ERROR"),
             status_code=500,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
 
 
@@ -270,68 +353,72 @@ async def convert_json_to_excel(req: func.HttpRequest) -> func.HttpResponse:
         
         # Get JSON data from request body
         try:
-            request_body = req.get_json()
+            request_body = await asyncio.to_thread(req.get_json)
             if not request_body or 'data' not in request_body:
-                error_response = ErrorResponse(
-                    error="No JSON data provided in request body",
-                    error_code="NO_DATA_PROVIDED"
-                )
                 return func.HttpResponse(
-                    error_response.model_dump_json(),
+                    _error_json("No JSON data provided in request body", "NO_DATA_PROVIDED"),
                     status_code=400,
-                    headers=get_cors_headers()
+                    headers=_CORS_HEADERS
                 )
             
             json_data = request_body['data']
             filename = request_body.get('filename', 'converted_data.xlsx')
             apply_formatting = request_body.get('apply_formatting', True)
+            orient = request_body.get('orient') or req.params.get('orient') or 'records'
             
         except Exception as e:
-            error_response = ErrorResponse(
-                error="Invalid JSON in request body",
-                error_code="INVALID_JSON"
-            )
             return func.HttpResponse(
-                error_response.model_dump_json(),
+                _error_json("Invalid JSON in request body", "INVALID_JSON"),
                 status_code=400,
-                headers=get_cors_headers()
+                headers=_CORS_HEADERS
             )
         
         # Process the conversion
-        result = await converter_service.convert_json_to_excel(
+        result = await _get_converter_service().convert_json_to_excel(
             json_data=json_data,
             filename=filename,
-            apply_formatting=apply_formatting
+            apply_formatting=apply_formatting,
+            orient=orient
         )
         
-        # Return the Excel file as base64
-        import base64
-        excel_b64 = base64.b64encode(result['excel_content']).decode('utf-8')
-        
-        response_data = {
-            "success": True,
-            "message": "JSON converted to Excel successfully",
-            "filename": result['filename'],
-            "excel_base64": excel_b64,
-            "metadata": result.get('metadata', {})
-        }
+        # Clients that explicitly ask for JSON get the legacy base64 envelope
+        if "application/json" in req.headers.get('Accept', ''):
+            excel_b64 = base64.b64encode(result['excel_content']).decode('ascii')
+            
+            response_data = {
+                "success": True,
+                "message": "JSON converted to Excel successfully",
+                "filename": result['filename'],
+                "excel_base64": excel_b64,
+                "metadata": result.get('metadata', {})
+            }
+            
+            return func.HttpResponse(
+                orjson.dumps(response_data),
+                status_code=200,
+                headers=_CORS_HEADERS
+            )
         
+        # Otherwise return the workbook itself, with metadata in headers
         return func.HttpResponse(
-            json.dumps(response_data),
+            result['excel_content'],
             status_code=200,
-            headers=get_cors_headers()
+            headers={
+                **_CORS_HEADERS,
+                "Content-Type": _XLSX_CONTENT_TYPE,
+                "Content-Disposition": _content_disposition(result["filename"]),
+                # ASCII-escaped, so non-latin-1 filenames stay valid in a header
+                "X-Metadata": json.dumps(result.get('metadata', {}), ensure_ascii=True, default=_orjson_default),
+                "Access-Control-Expose-Headers": "Content-Disposition, X-Metadata"
+            }
         )
         
     except Exception as e:
-        logger.error(f"JSON to Excel conversion failed: {str(e)}")
-        error_response = ErrorResponse(
-            message=f"JSON to Excel conversion failed: {str(e)}",
-            error_code="JSON_TO_EXCEL_ERROR"
-        )
+        logger.error("JSON to Excel conversion failed: %s", e)
         return func.HttpResponse(
-            error_response.model_dump_json(),
+            _error_json(f"JSON to Excel conversion failed: {str(e)}", "JSON_TO_EXCEL_ERROR"),
             status_code=500,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
 
 
@@ -346,31 +433,25 @@ async def convert_excel_to_sql(req: func.HttpRequest) -> func.HttpResponse:
         # Get file from request
         files = req.files
         if not files or 'file' not in files:
-            error_response = ErrorResponse(
-                error="No file provided",
-                error_code="NO_FILE_PROVIDED"
-            )
             return func.HttpResponse(
-                error_response.model_dump_json(),
+                _error_json("No file provided", "NO_FILE_PROVIDED"),
                 status_code=400,
-                headers=get_cors_headers()
+                headers=_CORS_HEADERS
             )
         
         file = files['file']
         
-        # Get parameters
-        table_name = req.params.get('table_name', 'converted_data')
-        include_create_table = req.params.get('include_create_table', 'true').lower() == 'true'
-        include_inserts = req.params.get('include_inserts', 'true').lower() == 'true'
+        # Parse parameters before spooling, so a bad value can't leave the
+        # spooled upload unclosed
+        params = _parse_sql_params(req.params)
         
-        # Process the conversion
-        result = await converter_service.convert_excel_to_sql(
-            file_content=file.read(),
-            filename=file.filename,
-            table_name=table_name,
-            include_create_table=include_create_table,
-            include_inserts=include_inserts
-        )
+        # Spool the upload in a worker thread, then process the conversion
+        with await asyncio.to_thread(_spool_upload, file) as file_content:
+            result = await _get_converter_service().convert_excel_to_sql(
+                file_content=file_content,
+                filename=file.filename,
+                **params
+            )
         
         response_data = {
             "success": True,
@@ -380,25 +461,16 @@ async def convert_excel_to_sql(req: func.HttpRequest) -> func.HttpResponse:
         }
         
         return func.HttpResponse(
-            json.dumps(response_data),
+            orjson.dumps(response_data),
             status_code=200,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
         
     except Exception as e:
-        logger.error(f"Excel to SQL conversion failed: {str(e)}")
-        error_response = ErrorResponse(
-            message=f"Excel to SQL conversion failed: {str(e)}",
-            error_code="EXCEL_TO_SQL_ERROR"
-        )
+        logger.error("Excel to SQL conversion failed: %s", e)
         return func.HttpResponse(
-            error_response.model_dump_json(),
+            _error_json(f"Excel to SQL conversion failed: {str(e)}", "EXCEL_TO_SQL_ERROR"),
             status_code=500,
-            headers=get_cors_headers()
+            headers=_CORS_HEADERS
         )
 
-
-if __name__ == "__main__":
-    # This won't be used in Azure Functions, but useful for local testing
-    import uvicorn
-    logger.info("🌟 Starting Azure Functions locally")
@@ -14,6 +14,10 @@ class FileFormat(str, Enum):
     CSV = "csv"
 
 
+# Lowercase extensions (without dot) accepted for uploads
+_ALLOWED_EXTENSIONS = frozenset(file_format.value for file_format in FileFormat)
+
+
 class ConversionRequest(BaseModel):
     """Request model for file conversion"""
     
@@ -45,6 +49,12 @@ class ConversionRequest(BaseModel):
         gt=0,
         description="Maximum number of rows to process"
     )
+    
+    orient: str = Field(
+        default="records",
+        description="JSON data layout: records, split (columns plus row arrays) or columns",
+        pattern="^(records|split|columns)$"
+    )
 
 
 class JsonToExcelRequest(BaseModel):
@@ -82,6 +92,12 @@ class JsonToExcelRequest(BaseModel):
         description="Whether to optimize the Excel layout (requires AI)"
     )
     
+    orient: str = Field(
+        default="records",
+        description="Layout of json_data: records, split (columns plus row arrays) or columns",
+        pattern="^(records|split|columns)$"
+    )
+    
     @field_validator('optimize_layout')
     @classmethod
     def validate_optimize_layout(cls, v, info):
@@ -102,7 +118,8 @@ class FileUploadRequest(BaseModel):
     @classmethod
     def validate_filename(cls, v):
         """Validate file extension"""
-        if not any(v.lower().endswith(ext) for ext in ['.xlsx', '.xls', '.csv']):
+        _, dot, extension = v.rpartition('.')
+        if not dot or extension.lower() not in _ALLOWED_EXTENSIONS:
             raise ValueError('Unsupported file format')
         return v
     
@@ -4,7 +4,8 @@ Pydantic models for API responses
 
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+
+from utils.timestamps import utc_now_iso
 
 
 class AIUsageInfo(BaseModel):
@@ -47,7 +48,7 @@ class ConversionResponse(BaseModel):
     status: str = Field(default="SUCCESS", description="Operation status")
     data: List[Dict[str, Any]] = Field(..., description="Converted data")
     metadata: ConversionMetadata = Field(..., description="Conversion metadata")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Response timestamp")
+    timestamp: str = Field(default_factory=utc_now_iso, description="Response timestamp")
 
 
 class HealthResponse(BaseModel):
@@ -56,7 +57,7 @@ class HealthResponse(BaseModel):
     status: str = Field(default="ONLINE", description="Service status")
     neural_network: str = Field(default="ACTIVE", description="Neural network status")
     ai_engine: str = Field(default="READY", description="AI engine status")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Check timestamp")
+    timestamp: str = Field(default_factory=utc_now_iso, description="Check timestamp")
 
 
 class RootResponse(BaseModel):
@@ -75,7 +76,7 @@ class JsonToExcelResponse(BaseModel):
     filename: str = Field(..., description="Generated Excel filename")
     download_url: str = Field(..., description="URL to download the file")
     metadata: Dict[str, Any] = Field(..., description="Conversion metadata")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Response timestamp")
+    timestamp: str = Field(default_factory=utc_now_iso, description="Response timestamp")
 
 
 class SqlGenerationResponse(BaseModel):
@@ -86,7 +87,7 @@ class SqlGenerationResponse(BaseModel):
     statements: Dict[str, Any] = Field(..., description="Generated SQL statements")
     metadata: Dict[str, Any] = Field(..., description="Generation metadata")
     download_url: Optional[str] = Field(default=None, description="URL to download SQL file")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Response timestamp")
+    timestamp: str = Field(default_factory=utc_now_iso, description="Response timestamp")
 
 
 class ErrorResponse(BaseModel):
@@ -96,4 +97,4 @@ class ErrorResponse(BaseModel):
     status: str = Field(default="ERROR", description="Error status")
     error_code: Optional[str] = Field(default=None, description="Error code")
     details: Optional[Dict[str, Any]] = Field(default=None, description="Additional error details")
-    timestamp: datetime = Field(default_factory=datetime.utcnow, description="Error timestamp")
+    timestamp: str = Field(default_factory=utc_now_iso, description="Error timestamp")
@@ -2,12 +2,152 @@
 AI Service for data analysis and processing
 """
 
+import asyncio
+import hashlib
+import importlib.util
+import random
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import orjson
 import pandas as pd
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from core.config import get_azure_settings
 from models.responses import AIAnalysis, AIUsageInfo
-from services.azure_openai_service import AzureOpenAIService
+from services.azure_openai_pool import AzureOpenAIPool
 from utils.logger import logger
-from utils.exceptions import AIProcessingError
+from utils.exceptions import AIProcessingError, AITransientError
+
+
+# Malformed cell values: whitespace only, Excel "###" errors, explicit nulls,
+# and over-precise ISO timestamps
+_MALFORMED_RE = re.compile(
+    r'^(?:\s*|#+|N/A|n/a|NULL|null|\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z?)$'
+)
+
+# Common date prefixes: YYYY-MM-DD, MM/DD/YYYY, MM-DD-YYYY
+_DATETIME_RE = re.compile(r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4}')
+
+# Common encoding issue indicators: replacement character and NUL bytes
+_ENCODING_ISSUE_RE = re.compile('[\ufffd\x00]')
+
+# Content-based column type detection
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_URL_RE = re.compile(r'^https?://')
+_PHONE_RE = re.compile(r'^[\+]?[1-9][\d]{3,14}$')
+
+# Fixed column categories by dtype name; dtypes not listed here (object,
+# string, tz-aware datetimes, ...) go through _detect_column_type
+_DTYPE_CATEGORY = {
+    **{
+        name: "numeric"
+        for bits in (8, 16, 32, 64)
+        for name in (f"int{bits}", f"uint{bits}", f"Int{bits}", f"UInt{bits}")
+    },
+    **{name: "numeric" for name in ("float16", "float32", "float64", "Float32", "Float64")},
+    **{f"datetime64[{unit}]": "datetime" for unit in ("s", "ms", "us", "ns")},
+    "bool": "boolean",
+    "boolean": "boolean",
+}
+
+# Issue keywords that decide why AI was triggered
+_TRIGGER_RE = re.compile(
+    r'(?P<sql>sql|syntax|injection)'
+    r'|(?P<structure>nested|column_names|excel_limit)'
+    r'|(?P<data>mixed_types|encoding|malformed)'
+)
+
+# Column name normalization
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'\S+')
+_CAMEL_RE1 = re.compile(r'(.)([A-Z][a-z]+)')
+_CAMEL_RE2 = re.compile(r'([a-z0-9])([A-Z])')
+
+# Characters Excel rejects in header names, mapped to '_'
+_EXCEL_BAD_CHARS = str.maketrans(dict.fromkeys('/\\*?[]', '_'))
+
+# infer_dtype results that rule out nested dict/list values in a column
+_SCALAR_INFERRED_TYPES = frozenset((
+    'empty', 'string', 'bytes', 'integer', 'floating', 'mixed-integer-float',
+    'decimal', 'complex', 'boolean', 'datetime64', 'datetime', 'date',
+    'timedelta64', 'timedelta', 'time', 'period', 'interval'
+))
+
+# Issue tags handled by the basic Excel optimization
+_OPT_TAGS = (
+    "nested_data",
+    "problematic_column_names",
+    "long_text_values",
+    "mixed_types",
+    "exceeds_excel_row_limit",
+    "exceeds_excel_column_limit",
+)
+
+# String dtype for text rewritten during Excel prep: Arrow-backed when pyarrow
+# is installed (contiguous buffers for .str operations), pandas' own otherwise
+_STRING_DTYPE = "string[pyarrow]" if importlib.util.find_spec("pyarrow") else "string"
+
+# Excel worksheet size limits
+_EXCEL_MAX_ROWS = 1_048_576
+_EXCEL_MAX_COLUMNS = 16_384
+
+# Rows sent to the model when asking for Excel optimizations
+_AI_SAMPLE_ROWS = 100
+
+# Serialization of that sample for its cache key: JSON keeps 1 and "1" apart,
+# and values orjson can't encode (e.g. Timestamp) are hashed by their repr
+_SAMPLE_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Number of AI results kept in the cache
+_ANALYSIS_CACHE_SIZE = 32
+
+# Analysis runs in worker threads, so cache reads/writes are serialized
+_CACHE_LOCK = threading.Lock()
+
+# Data quality scans run side by side on frames with at least this many cells;
+# smaller frames are cheaper to scan serially than to hand off to threads
+_PARALLEL_QUALITY_CELLS = 100_000
+_QUALITY_EXECUTOR = ThreadPoolExecutor(max_workers=3, thread_name_prefix="quality-check")
+
+
+def _numeric_counts(samples: List[pd.Series]) -> np.ndarray:
+    """Count numeric-parsable values in each sample with a single pd.to_numeric call"""
+    lengths = np.array([len(sample) for sample in samples], dtype=np.intp)
+    if not lengths.sum():
+        return np.zeros(len(samples), dtype=np.intp)
+    
+    values = np.concatenate([sample.to_numpy(dtype=object) for sample in samples])
+    is_numeric = pd.notna(pd.to_numeric(values, errors='coerce'))
+    
+    # Per-sample totals from the running count at each sample boundary
+    running = np.concatenate(([0], np.cumsum(is_numeric)))
+    ends = np.cumsum(lengths)
+    return running[ends] - running[ends - lengths]
+
+
+def _cache_get(cache: OrderedDict, key: Optional[tuple]) -> Any:
+    """Look up an LRU cache entry, refreshing its position on hit"""
+    if key is None:
+        return None
+    with _CACHE_LOCK:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key: Optional[tuple], value: Any) -> None:
+    """Store an LRU cache entry, evicting the oldest beyond the size bound"""
+    if key is None:
+        return
+    with _CACHE_LOCK:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > _ANALYSIS_CACHE_SIZE:
+            cache.popitem(last=False)
 
 
 class AIService:
@@ -15,7 +155,15 @@ class AIService:
     
     def __init__(self):
         self.confidence_threshold = 0.8
-        self.azure_openai = AzureOpenAIService()
+        self.azure_openai_pool = AzureOpenAIPool()
+        self.azure_openai = self.azure_openai_pool.primary
+        self._ai_cache: OrderedDict = OrderedDict()
+        self._constant_usage: Dict[str, AIUsageInfo] = {}
+        
+        # AI micro-batching: requests are queued and flushed by a background task
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_worker: Optional[asyncio.Task] = None
+        self._batch_flushes: set = set()
         logger.info("AI Service initialized")
     
     async def analyze_dataframe(
@@ -44,28 +192,30 @@ class AIService:
         try:
             logger.info(f"INFO: Starting deterministic analysis for {filename}")
             
-            # Always try deterministic analysis first
-            deterministic_result = self._deterministic_analysis(df)
+            # Always try deterministic analysis first (off the event loop, it
+            # scans the whole frame)
+            deterministic_result = await asyncio.to_thread(self._deterministic_analysis, df)
             
             # Check if deterministic analysis found problems
             if deterministic_result.get("has_issues", False):
                 issues = deterministic_result.get('issues', [])
                 logger.warning(f"WARNING: Data issues detected: {issues}")
                 
-                if use_ai and self.azure_openai.is_configured:
+                if use_ai and self.azure_openai_pool.is_configured:
                     logger.info("🤖 Calling AI to resolve data issues...")
                     # Only use AI to resolve specific problems
-                    analysis_result = await self.azure_openai.analyze_excel_data(
-                        df, filename, True, issues
+                    analysis_result, ai_attempts = await self._batched_ai_analyze(df, filename, issues)
+                    ai_analysis = self._convert_to_ai_analysis(
+                        analysis_result, df, deterministic_result.get("column_types")
                     )
-                    ai_analysis = self._convert_to_ai_analysis(analysis_result, df)
                     
                     # Create AI usage info
                     ai_usage = self.create_ai_usage_info(
                         ai_used=True,
                         processing_mode="ai_assisted",
                         detected_issues=issues,
-                        ai_improvements=analysis_result.get("recommendations", [])
+                        ai_improvements=analysis_result.get("recommendations", []),
+                        ai_attempts=ai_attempts
                     )
                     
                     return ai_analysis, ai_usage
@@ -96,7 +246,7 @@ class AIService:
         except Exception as e:
             logger.error(f"ERROR: Analysis failed: {str(e)}")
             # Last resort: basic analysis
-            basic_analysis = self._basic_analysis(df)
+            basic_analysis = await asyncio.to_thread(self._basic_analysis, df)
             ai_usage = self.create_ai_usage_info(
                 ai_used=False,
                 processing_mode="error_fallback",
@@ -104,12 +254,107 @@ class AIService:
             )
             return basic_analysis, ai_usage
     
+    async def _batched_ai_analyze(
+        self,
+        df: pd.DataFrame,
+        filename: str,
+        issues: List[str]
+    ) -> tuple:
+        """
+        Queue an AI issue analysis and wait for its result
+        
+        Concurrent requests are grouped by a background task into batches of up
+        to ``ai_batch_max_size`` (or whatever arrives within
+        ``ai_batch_max_wait_ms``) and resolved with a single Azure OpenAI call.
+        
+        Returns:
+            Tuple of (analysis_result, attempts used for the AI call)
+        """
+        
+        if self._batch_worker is None or self._batch_worker.done():
+            self._batch_queue = asyncio.Queue()
+            self._batch_worker = asyncio.create_task(self._run_ai_batches(self._batch_queue))
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._batch_queue.put((df, filename, issues, future))
+        return await future
+    
+    async def _run_ai_batches(self, queue: asyncio.Queue) -> None:
+        """Background task: collect queued AI analyses and flush them in batches"""
+        
+        settings = get_azure_settings()
+        max_batch_size = max(settings.ai_batch_max_size, 1)
+        max_wait = settings.ai_batch_max_wait_ms / 1000
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + max_wait
+            
+            while len(batch) < max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            # Flush concurrently so a batch in retry backoff doesn't hold up the next
+            flush = asyncio.create_task(self._flush_ai_batch(batch))
+            self._batch_flushes.add(flush)
+            flush.add_done_callback(self._batch_flushes.discard)
+    
+    async def _flush_ai_batch(self, batch: List[tuple]) -> None:
+        """Resolve one batch of queued AI analyses with a single (retried) call"""
+        
+        # Identical requests are deduplicated by analyze_excel_data_batch on
+        # their exact prompt text
+        try:
+            requests = [(df, filename, issues) for df, filename, issues, _ in batch]
+            results, attempts = await self._call_ai_with_retry(
+                lambda: self.azure_openai_pool.run(
+                    lambda service: service.analyze_excel_data_batch(requests)
+                )
+            )
+            for (_, _, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result((result, attempts))
+        except Exception as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+    
+    async def _call_ai_with_retry(self, operation, max_attempts: int = 3) -> tuple:
+        """
+        Run an AI call, retrying transient failures with exponential backoff
+        
+        Rate limits, connection errors, timeouts and 5xx responses are retried
+        after ``min(2**n + jitter, 30)`` seconds.
+        
+        Returns:
+            Tuple of (result, attempts used)
+        """
+        
+        for attempt in range(max_attempts):
+            try:
+                return await operation(), attempt + 1
+            except AITransientError as e:
+                if attempt + 1 >= max_attempts:
+                    raise
+                delay = min(2 ** attempt + random.random() * 0.5, 30)
+                logger.warning(
+                    f"WARNING: AI call failed ({e.message}), retry {attempt + 1}/{max_attempts - 1} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+    
     def create_ai_usage_info(
         self,
         ai_used: bool,
         processing_mode: str,
         detected_issues: List[str] = None,
-        ai_improvements: List[str] = None
+        ai_improvements: List[str] = None,
+        ai_attempts: int = 1
     ) -> AIUsageInfo:
         """
         Create user-friendly AI usage information
@@ -119,6 +364,7 @@ class AIService:
             processing_mode: Processing mode used
             detected_issues: Issues that triggered AI
             ai_improvements: Improvements AI made
+            ai_attempts: Number of attempts the AI call needed
             
         Returns:
             AIUsageInfo with user-friendly explanations
@@ -127,23 +373,49 @@ class AIService:
         detected_issues = detected_issues or []
         ai_improvements = ai_improvements or []
         
+        # Without AI or issues the result only depends on the mode (e.g. the
+        # clean-data "deterministic" path), so reuse one instance per mode
+        if not ai_used and not detected_issues and not ai_improvements:
+            usage = self._constant_usage.get(processing_mode)
+            if usage is None:
+                usage = self._build_ai_usage_info(ai_used, processing_mode, detected_issues, ai_improvements)
+                self._constant_usage[processing_mode] = usage
+            return usage
+        
+        return self._build_ai_usage_info(
+            ai_used, processing_mode, detected_issues, ai_improvements, ai_attempts
+        )
+    
+    def _build_ai_usage_info(
+        self,
+        ai_used: bool,
+        processing_mode: str,
+        detected_issues: List[str],
+        ai_improvements: List[str],
+        ai_attempts: int = 1
+    ) -> AIUsageInfo:
+        """Build an AIUsageInfo instance"""
+        
         # Generate user-friendly explanation
         explanation = self._generate_user_explanation(ai_used, processing_mode, detected_issues)
         
         # Determine trigger reason
         trigger_reason = self._determine_trigger_reason(detected_issues) if ai_used else None
         
-        return AIUsageInfo(
+        # Inputs are built internally, so skip Pydantic validation; AI-provided
+        # improvements are coerced to strings to keep the model's types intact
+        return AIUsageInfo.model_construct(
             ai_used=ai_used,
             processing_mode=processing_mode,
             trigger_reason=trigger_reason,
             issues_detected=detected_issues,
-            ai_improvements=ai_improvements,
+            ai_improvements=[str(improvement) for improvement in ai_improvements],
             user_friendly_explanation=explanation,
             technical_details={
                 "issues_count": len(detected_issues),
                 "improvements_count": len(ai_improvements),
-                "mode": processing_mode
+                "mode": processing_mode,
+                "attempts": ai_attempts
             } if ai_used else None
         )
     
@@ -178,16 +450,16 @@ class AIService:
         if not detected_issues:
             return "optimization_request"
         
-        # Categorize issues
-        data_issues = [issue for issue in detected_issues if any(keyword in issue for keyword in ["mixed_types", "encoding", "malformed"])]
-        structure_issues = [issue for issue in detected_issues if any(keyword in issue for keyword in ["nested", "column_names", "excel_limit"])]
-        sql_issues = [issue for issue in detected_issues if any(keyword in issue for keyword in ["sql", "syntax", "injection"])]
+        # Categorize issues in one scan; every keyword hit in an issue counts
+        categories = set()
+        for issue in detected_issues:
+            categories.update(match.lastgroup for match in _TRIGGER_RE.finditer(issue))
         
-        if sql_issues:
+        if "sql" in categories:
             return "sql_generation_errors"
-        elif structure_issues:
+        elif "structure" in categories:
             return "data_structure_complexity"
-        elif data_issues:
+        elif "data" in categories:
             return "data_quality_issues"
         else:
             return "general_optimization"
@@ -221,54 +493,70 @@ class AIService:
         """
         
         issues = []
-        has_issues = False
         
         try:
+            # One null-mask pass gives both per-column and overall missing %
+            missing_percentage = df.isna().mean() * 100
+            
+            # Single pass over the columns: column type, mixed types and
+            # malformed patterns are computed together from one sample
+            column_types = {}
+            object_samples = {}
+            malformed_issues = []
+            
+            for col, series in df.items():
+                if series.dtype == 'object':  # String columns
+                    sample = series.dropna().head(100)
+                    object_samples[col] = sample
+                    if self._has_malformed_patterns(sample):
+                        malformed_issues.append(f"malformed_data_in_column_{col}")
+                    column_types[col] = self._detect_column_type(sample)
+                else:
+                    column_types[col] = self._detect_column_type(series)
+            
+            # Mixed if a sample has both numbers and strings; one batched parse
+            # covers every object column instead of a to_numeric call per column
+            numeric_counts = _numeric_counts(list(object_samples.values()))
+            mixed_type_issues = [
+                f"mixed_types_in_column_{col}"
+                for (col, sample), numeric_count in zip(object_samples.items(), numeric_counts)
+                if 0 < numeric_count < len(sample)
+            ]
+            
             # Check for common data problems
             
             # 1. Empty or mostly empty DataFrame
             if df.empty or df.shape[0] == 0:
                 issues.append("empty_dataframe")
-                has_issues = True
             
-            # 2. Check for columns with mixed data types
-            for col in df.columns:
-                if self._has_mixed_types(df[col]):
-                    issues.append(f"mixed_types_in_column_{col}")
-                    has_issues = True
+            # 2. Columns with mixed data types
+            issues.extend(mixed_type_issues)
             
-            # 3. Check for excessive missing data
-            missing_percentage = (df.isnull().sum() / len(df)) * 100
+            # 3. Excessive missing data
             high_missing_cols = missing_percentage[missing_percentage > 50].index.tolist()
             if high_missing_cols:
                 issues.append(f"high_missing_data_in_columns_{','.join(high_missing_cols)}")
-                has_issues = True
             
-            # 4. Check for duplicate column names
+            # 4. Duplicate column names
             if len(df.columns) != len(set(df.columns)):
                 issues.append("duplicate_column_names")
-                has_issues = True
             
-            # 5. Check for malformed data patterns
-            for col in df.columns:
-                if df[col].dtype == 'object':  # String columns
-                    if self._has_malformed_patterns(df[col]):
-                        issues.append(f"malformed_data_in_column_{col}")
-                        has_issues = True
+            # 5. Malformed data patterns
+            issues.extend(malformed_issues)
             
             # 6. Check for encoding issues
             if self._has_encoding_issues(df):
                 issues.append("encoding_issues")
-                has_issues = True
                 
             logger.info(f"INFO: Deterministic analysis complete - Issues found: {len(issues)}")
             
             return {
-                "has_issues": has_issues,
+                "has_issues": bool(issues),
                 "issues": issues,
-                "column_types": self._detect_column_types(df),
+                "column_types": dict(column_types),
                 "data_shape": df.shape,
                 "missing_data": missing_percentage.to_dict(),
+                "missing_overall": missing_percentage.mean(),
                 "analysis_type": "deterministic"
             }
             
@@ -287,24 +575,29 @@ class AIService:
         """Check if a series has mixed data types"""
         if series.dtype == 'object':
             # Check if we have numbers mixed with strings
-            non_null_values = series.dropna()
-            if len(non_null_values) == 0:
+            sample = series.dropna().head(100)  # Sample first 100 values
+            if len(sample) == 0:
                 return False
-                
-            numeric_count = 0
-            string_count = 0
             
-            for val in non_null_values.head(100):  # Sample first 100 values
-                try:
-                    float(val)
-                    numeric_count += 1
-                except (ValueError, TypeError):
-                    string_count += 1
+            numeric_count = int(pd.to_numeric(sample, errors='coerce').notna().sum())
+            string_count = len(sample) - numeric_count
             
             # Mixed if we have both numbers and strings
             return numeric_count > 0 and string_count > 0
         return False
     
+    def _has_mixed_value_types(self, series: pd.Series, sample_size: int = 1000) -> bool:
+        """Check if the leading non-null values of a series hold more than one Python type"""
+        # Slice before dropping nulls so only the sampled rows are copied
+        iterator = iter(series.iloc[:sample_size].dropna())
+        try:
+            first_type = type(next(iterator))
+        except StopIteration:
+            return False
+        
+        # Stops at the first value whose type differs from the first one
+        return any(type(value) is not first_type for value in iterator)
+    
     def _has_malformed_patterns(self, series: pd.Series) -> bool:
         """Check for malformed data patterns"""
         non_null_values = series.dropna()
@@ -313,31 +606,16 @@ class AIService:
             
         sample_values = non_null_values.head(50).astype(str)
         
-        # Check for common malformed patterns
-        malformed_patterns = [
-            r'^\s*$',  # Only whitespace
-            r'^#+$',   # Only hash symbols (Excel errors)
-            r'^N/A$|^n/a$|^NULL$|^null$',  # Explicit null values
-            r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d+Z?$',  # Malformed dates
-        ]
-        
-        import re
-        for pattern in malformed_patterns:
-            matches = sample_values.str.match(pattern, na=False).sum()
-            if matches > len(sample_values) * 0.1:  # More than 10% malformed
-                return True
-        
-        return False
+        # More than 10% malformed
+        matches = sample_values.str.match(_MALFORMED_RE, na=False).sum()
+        return matches > len(sample_values) * 0.1
     
     def _has_encoding_issues(self, df: pd.DataFrame) -> bool:
         """Check for encoding issues in string columns"""
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                sample_values = df[col].dropna().head(50).astype(str)
-                for val in sample_values:
-                    # Check for common encoding issue indicators
-                    if any(char in val for char in ['�', '\ufffd', '\x00']):
-                        return True
+        for col in df.select_dtypes(include='object').columns:
+            sample_values = df[col].dropna().head(50).astype(str)
+            if sample_values.str.contains(_ENCODING_ISSUE_RE, na=False).any():
+                return True
         return False
     
     def _convert_deterministic_to_ai_analysis(self, deterministic_result: Dict[str, Any], df: pd.DataFrame) -> AIAnalysis:
@@ -353,7 +631,8 @@ class AIService:
             confidence = 95.0  # High confidence for clean data
             recommendations = ["Data appears clean and well-structured"]
         
-        return AIAnalysis(
+        # Trusted internal data: skip Pydantic validation
+        return AIAnalysis.model_construct(
             confidence=confidence,
             analysis_type=deterministic_result.get("analysis_type", "deterministic"),
             detected_patterns=deterministic_result.get("issues", []),
@@ -364,7 +643,7 @@ class AIService:
     def _basic_analysis(self, df: pd.DataFrame) -> AIAnalysis:
         """Basic deterministic analysis"""
         
-        return AIAnalysis(
+        return AIAnalysis.model_construct(
             confidence=85.0,
             analysis_type="deterministic",
             detected_patterns=["basic_table_structure"],
@@ -401,33 +680,48 @@ class AIService:
     def _detect_column_types(self, df: pd.DataFrame) -> Dict[str, str]:
         """Detect column data types"""
         
-        column_types = {}
+        # Fast path: every dtype maps to a fixed category (e.g. all-numeric or
+        # datetime frames), so there is nothing to sniff
+        categories = [_DTYPE_CATEGORY.get(str(dtype)) for dtype in df.dtypes]
+        if None not in categories:
+            return dict(zip(df.columns, categories))
         
-        for col in df.columns:
-            dtype = str(df[col].dtype)
-            
-            if 'int' in dtype or 'float' in dtype:
-                column_types[col] = "numeric"
-            elif 'datetime' in dtype:
-                column_types[col] = "datetime"
-            elif df[col].dtype == 'bool':
-                column_types[col] = "boolean"
-            else:
-                # Advanced type detection
-                if self._is_email_column(df[col]):
-                    column_types[col] = "email"
-                elif self._is_url_column(df[col]):
-                    column_types[col] = "url"
-                elif self._is_phone_column(df[col]):
-                    column_types[col] = "phone"
-                else:
-                    column_types[col] = "text"
+        return {col: self._detect_column_type(series) for col, series in df.items()}
+    
+    def _detect_column_type(self, series: pd.Series) -> str:
+        """Detect the data type category of a single column"""
+        
+        dtype = series.dtype
+        
+        category = _DTYPE_CATEGORY.get(str(dtype))
+        if category is not None:
+            return category
+        
+        # bool is checked first since pandas treats it as numeric
+        if pd.api.types.is_bool_dtype(dtype):
+            return "boolean"
+        elif pd.api.types.is_numeric_dtype(dtype):
+            return "numeric"
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            return "datetime"
         
-        return column_types
+        # Advanced type detection only makes sense for object columns with values
+        if not pd.api.types.is_object_dtype(dtype) or not series.notna().any():
+            return "text"
+        
+        return self._classify_object_column(series)
     
-    def _detect_patterns(self, df: pd.DataFrame) -> List[str]:
-        """Detect data patterns"""
+    def _detect_patterns(self, df: pd.DataFrame, precomputed: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Detect data patterns
+        
+        Args:
+            df: DataFrame to inspect
+            precomputed: Values already known for this frame, e.g. the
+                deterministic analysis result ("missing_overall", "column_types")
+        """
         
+        precomputed = precomputed or {}
         patterns = []
         
         # Structure patterns
@@ -438,7 +732,9 @@ class AIService:
             patterns.append("simple_structure")
         
         # Data quality patterns
-        null_percentage = (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+        null_percentage = precomputed.get("missing_overall")
+        if null_percentage is None:
+            null_percentage = df.isna().mean().mean() * 100
         
         if null_percentage > 10:
             patterns.append("missing_values")
@@ -456,8 +752,12 @@ class AIService:
             patterns.append("duplicates_detected")
         
         # Numeric patterns
-        numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns
-        if len(numeric_cols) > 0:
+        column_types = precomputed.get("column_types")
+        if column_types is not None:
+            has_numeric = "numeric" in column_types.values()
+        else:
+            has_numeric = not df.select_dtypes(include='number').columns.empty
+        if has_numeric:
             patterns.append("numeric_data")
         
         return patterns
@@ -511,35 +811,21 @@ class AIService:
         
         return max(min(base_confidence, 100.0), 60.0)
     
-    def _is_email_column(self, series: pd.Series) -> bool:
-        """Check if column contains email addresses"""
-        if series.dtype != 'object':
-            return False
+    def _classify_object_column(self, series: pd.Series) -> str:
+        """Classify an object column as email, url, phone or text from one sample"""
         
         sample = series.dropna().head(10)
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        
-        return sample.str.match(email_pattern).sum() > len(sample) * 0.7
-    
-    def _is_url_column(self, series: pd.Series) -> bool:
-        """Check if column contains URLs"""
-        if series.dtype != 'object':
-            return False
-        
-        sample = series.dropna().head(10)
-        url_pattern = r'^https?://'
-        
-        return sample.str.match(url_pattern).sum() > len(sample) * 0.7
-    
-    def _is_phone_column(self, series: pd.Series) -> bool:
-        """Check if column contains phone numbers"""
-        if series.dtype != 'object':
-            return False
-        
-        sample = series.dropna().head(10)
-        phone_pattern = r'^[\+]?[1-9][\d]{3,14}$'
-        
-        return sample.str.match(phone_pattern).sum() > len(sample) * 0.7
+        threshold = len(sample) * 0.7
+        try:
+            strings = sample.str
+        except AttributeError:
+            # No string values at all (e.g. only nested dicts/lists)
+            return "text"
+        
+        for category, pattern in (("email", _EMAIL_RE), ("url", _URL_RE), ("phone", _PHONE_RE)):
+            if strings.match(pattern).sum() > threshold:
+                return category
+        return "text"
     
     def optimize_dataframe_for_excel(
         self, 
@@ -561,19 +847,20 @@ class AIService:
         
         try:
             if not use_ai:
-                return self._basic_excel_optimization(df)
+                return self._basic_excel_cleanup(df)
             
             return self._ai_powered_excel_optimization(df, min_confidence)
             
         except Exception as e:
             logger.error(f"ERROR: Excel optimization failed: {str(e)}")
             # Fallback to basic optimization
-            return self._basic_excel_optimization(df)
+            return self._basic_excel_cleanup(df)
     
-    def _basic_excel_optimization(self, df: pd.DataFrame) -> tuple:
+    def _basic_excel_cleanup(self, df: pd.DataFrame) -> tuple:
         """Basic Excel optimization without AI"""
         
-        optimized_df = df.copy()
+        # Shallow copy: with Copy-on-Write only modified columns get copied
+        optimized_df = df.copy(deep=False)
         
         analysis = {
             "confidence": 85.0,
@@ -593,7 +880,7 @@ class AIService:
         
         # Clean column names (remove special characters)
         original_columns = list(optimized_df.columns)
-        optimized_df.columns = [self._clean_column_name(col) for col in optimized_df.columns]
+        optimized_df.columns = self._clean_column_names(optimized_df.columns)
         
         if list(optimized_df.columns) != original_columns:
             analysis["optimizations_applied"].append("column_name_cleanup")
@@ -611,7 +898,7 @@ class AIService:
             "recommendations": []
         }
         
-        optimized_df = df.copy()
+        optimized_df = df.copy(deep=False)
         
         # 1. Advanced data type optimization
         for col in optimized_df.columns:
@@ -640,7 +927,7 @@ class AIService:
         
         # 2. Intelligent column name optimization
         original_columns = list(optimized_df.columns)
-        optimized_df.columns = [self._optimize_column_name_ai(col) for col in optimized_df.columns]
+        optimized_df.columns = self._optimize_column_names_ai(optimized_df.columns)
         
         if list(optimized_df.columns) != original_columns:
             analysis["optimizations_applied"].append("intelligent_column_naming")
@@ -669,35 +956,39 @@ class AIService:
         logger.info(f"✅ AI Excel optimization completed - Applied {optimization_count} optimizations")
         return optimized_df, analysis
     
-    def _clean_column_name(self, column_name: str) -> str:
+    def _clean_column_names(self, columns: pd.Index) -> pd.Index:
         """Basic column name cleanup"""
-        import re
         # Remove special characters and normalize spaces
-        cleaned = re.sub(r'[^\w\s]', '', str(column_name))
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
-        return cleaned if cleaned else 'Unnamed_Column'
+        cleaned = (
+            columns.astype(str)
+            .str.replace(_NON_WORD_RE, '', regex=True)
+            .str.replace(_WHITESPACE_RE, ' ', regex=True)
+            .str.strip()
+        )
+        return cleaned.where(cleaned != '', 'Unnamed_Column')
     
-    def _optimize_column_name_ai(self, column_name: str) -> str:
+    def _optimize_column_names_ai(self, columns: pd.Index) -> pd.Index:
         """AI-powered column name optimization"""
-        import re
         
-        name = str(column_name).strip()
+        names = columns.astype(str).str.strip()
         
-        # Handle empty or invalid names
-        if not name or name.isspace():
-            return 'Unnamed_Column'
-        
-        # Convert snake_case to Title Case
-        if '_' in name:
-            words = name.split('_')
-            return ' '.join(word.capitalize() for word in words if word)
+        # snake_case becomes separate words; anything else gets camelCase split
+        is_snake = names.str.contains('_', regex=False)
+        camel_split = (
+            names.str.replace(_CAMEL_RE1, r'\1 \2', regex=True)
+            .str.replace(_CAMEL_RE2, r'\1 \2', regex=True)
+        )
+        words = names.str.replace('_', ' ', regex=False).where(is_snake, camel_split)
         
-        # Convert camelCase to Title Case
-        s1 = re.sub('(.)([A-Z][a-z]+)', r'\1 \2', name)
-        title_case = re.sub('([a-z0-9])([A-Z])', r'\1 \2', s1)
+        # Capitalize first letter of each word, collapsing whitespace
+        optimized = (
+            words.str.replace(_WORD_RE, lambda match: match.group(0).capitalize(), regex=True)
+            .str.replace(_WHITESPACE_RE, ' ', regex=True)
+            .str.strip()
+        )
         
-        # Capitalize first letter of each word
-        return ' '.join(word.capitalize() for word in title_case.split())
+        # Handle empty or invalid names
+        return optimized.where(optimized != '', 'Unnamed_Column')
     
     def _looks_like_datetime(self, series: pd.Series) -> bool:
         """Check if a series looks like datetime data"""
@@ -709,18 +1000,8 @@ class AIService:
             return False
         
         # Check for common datetime patterns
-        datetime_patterns = [
-            r'\d{4}-\d{2}-\d{2}',  # YYYY-MM-DD
-            r'\d{2}/\d{2}/\d{4}',  # MM/DD/YYYY
-            r'\d{2}-\d{2}-\d{4}',  # MM-DD-YYYY
-        ]
-        
-        for pattern in datetime_patterns:
-            matches = sample.astype(str).str.match(pattern).sum()
-            if matches > len(sample) * 0.7:
-                return True
-        
-        return False
+        matches = sample.astype(str).str.match(_DATETIME_RE).sum()
+        return matches > len(sample) * 0.7
     
     def _looks_like_numeric(self, series: pd.Series) -> bool:
         """Check if a series looks like numeric data"""
@@ -741,48 +1022,126 @@ class AIService:
     
     def _reorder_columns_intelligently(self, df: pd.DataFrame) -> pd.DataFrame:
         """Reorder columns in a logical way"""
-        columns = list(df.columns)
-        
         # Priority order: ID columns, Name columns, Date columns, Number columns, Other
-        id_cols = [col for col in columns if 'id' in col.lower()]
-        name_cols = [col for col in columns if any(word in col.lower() for word in ['name', 'title', 'label'])]
-        date_cols = [col for col in columns if any(word in col.lower() for word in ['date', 'time', 'created', 'updated'])]
-        number_cols = [col for col in columns if df[col].dtype in ['int64', 'float64']]
-        other_cols = [col for col in columns if col not in id_cols + name_cols + date_cols + number_cols]
-        
-        # Remove duplicates while preserving order
-        reordered = []
-        for col_list in [id_cols, name_cols, date_cols, number_cols, other_cols]:
-            for col in col_list:
-                if col not in reordered:
-                    reordered.append(col)
-        
-        return df[reordered]
+        lowered = np.char.lower(np.asarray(df.columns, dtype=str))
+        
+        def contains_any(words):
+            mask = np.zeros(len(lowered), dtype=bool)
+            for word in words:
+                mask |= np.char.find(lowered, word) >= 0
+            return mask
+        
+        priority = np.select(
+            [
+                np.char.find(lowered, 'id') >= 0,
+                contains_any(('name', 'title', 'label')),
+                contains_any(('date', 'time', 'created', 'updated')),
+                np.array([str(dtype) in ('int64', 'float64') for dtype in df.dtypes], dtype=bool),
+            ],
+            [0, 1, 2, 3],
+            default=4
+        )
+        
+        # Stable sort keeps the original order within each group
+        return df.iloc[:, np.argsort(priority, kind='stable')]
     
     def _detect_data_quality_issues(self, df: pd.DataFrame) -> List[str]:
         """Detect potential data quality issues"""
+        
+        # Null percentages, duplicate rows and mixed types are independent
+        # passes over the frame; numpy releases the GIL, so they can overlap
+        if df.size >= _PARALLEL_QUALITY_CELLS:
+            null_future = _QUALITY_EXECUTOR.submit(self._null_percentages, df)
+            dup_future = _QUALITY_EXECUTOR.submit(self._duplicate_row_count, df)
+            mixed_future = _QUALITY_EXECUTOR.submit(self._mixed_type_columns, df)
+            null_pcts, dup_count, mixed_cols = (
+                null_future.result(), dup_future.result(), mixed_future.result()
+            )
+        else:
+            null_pcts = self._null_percentages(df)
+            dup_count = self._duplicate_row_count(df)
+            mixed_cols = self._mixed_type_columns(df)
+        
         recommendations = []
         
         # Check for high null percentage
-        for col in df.columns:
-            null_pct = (df[col].isnull().sum() / len(df)) * 100
-            if null_pct > 20:
-                recommendations.append(f"Column '{col}' has {null_pct:.1f}% missing values - consider data cleaning")
+        recommendations.extend(
+            f"Column '{col}' has {null_pct:.1f}% missing values - consider data cleaning"
+            for col, null_pct in null_pcts[null_pcts > 20].items()
+        )
         
         # Check for duplicate rows
-        if df.duplicated().any():
-            dup_count = df.duplicated().sum()
+        if dup_count:
             recommendations.append(f"Found {dup_count} duplicate rows - consider removing duplicates")
         
         # Check for inconsistent data types in object columns
-        for col in df.select_dtypes(include=['object']).columns:
-            if len(df[col].dropna()) > 0:
-                sample_types = df[col].dropna().apply(type).unique()
-                if len(sample_types) > 1:
-                    recommendations.append(f"Column '{col}' has mixed data types - consider data normalization")
+        recommendations.extend(
+            f"Column '{col}' has mixed data types - consider data normalization"
+            for col in mixed_cols
+        )
         
         return recommendations
     
+    def _null_percentages(self, df: pd.DataFrame) -> pd.Series:
+        """Missing-value percentage per column (one null-mask pass over the frame)"""
+        if len(df) == 0:
+            return pd.Series(dtype=float)
+        return df.isna().mean() * 100
+    
+    def _duplicate_row_count(self, df: pd.DataFrame) -> int:
+        """Number of rows repeating an earlier row (one row-hash pass)"""
+        duplicated = df.duplicated().to_numpy()
+        return int(duplicated.sum()) if duplicated.any() else 0
+    
+    def _mixed_type_columns(self, df: pd.DataFrame) -> List[str]:
+        """Object columns holding values of more than one Python type"""
+        return [
+            col for col in df.select_dtypes(include=['object']).columns
+            if self._has_mixed_value_types(df[col])
+        ]
+    
+    async def _optimize_json_for_excel_cached(
+        self,
+        df: pd.DataFrame,
+        use_ai: bool,
+        detected_issues: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ask Azure OpenAI for Excel optimizations, reusing earlier answers
+        
+        The model sees a sample of the rows plus the real row count, so the
+        cache key is a hash of the serialized sample (with column labels
+        kept apart by type), the row count, the detected issues and use_ai.
+        """
+        
+        # The model only needs a sample of the rows plus the real count
+        json_data = df.head(_AI_SAMPLE_ROWS).to_dict('records')
+        sample_hash = hashlib.sha256(
+            orjson.dumps(json_data, default=repr, option=_SAMPLE_JSON_OPTIONS)
+        ).hexdigest()
+        cache_key = (
+            sample_hash,
+            tuple(map(repr, df.columns)),
+            len(df),
+            tuple(sorted(detected_issues or [])),
+            use_ai,
+        )
+        cached = _cache_get(self._ai_cache, cache_key)
+        if cached is not None:
+            logger.info("INFO: Reusing cached AI Excel optimization")
+            return cached
+        
+        optimization_result, _ = await self._call_ai_with_retry(
+            lambda: self.azure_openai_pool.run(
+                lambda service: service.optimize_json_for_excel(
+                    json_data, use_ai, detected_issues, total_records=len(df)
+                )
+            )
+        )
+        
+        _cache_put(self._ai_cache, cache_key, optimization_result)
+        return optimization_result
+    
     async def optimize_dataframe_for_excel_with_ai(
         self, 
         df: pd.DataFrame, 
@@ -803,6 +1162,9 @@ class AIService:
             Tuple of (optimized_df, analysis_result, ai_usage_info)
         """
         
+        # Probe AI availability once for the whole call
+        ai_available = bool(use_ai) and self.azure_openai_pool.is_configured
+        
         if not detected_issues:
             # No issues detected, return original DataFrame
             analysis = {
@@ -817,7 +1179,7 @@ class AIService:
             )
             return df, analysis, ai_usage
         
-        if not use_ai or not self.azure_openai.is_configured:
+        if not ai_available:
             # AI not available, apply basic optimizations
             optimized_df = self._basic_excel_optimization(df, detected_issues)
             analysis = {
@@ -837,12 +1199,12 @@ class AIService:
             logger.info("🤖 Using AI to optimize DataFrame for Excel...")
             
             # Use AI to resolve specific issues
-            optimization_result = await self.azure_openai.optimize_json_for_excel(
-                df.to_dict('records'), use_ai, detected_issues
-            )
+            optimization_result = await self._optimize_json_for_excel_cached(df, use_ai, detected_issues)
             
             # Apply AI recommendations
-            optimized_df = self._apply_ai_optimizations(df, optimization_result)
+            optimized_df = await asyncio.to_thread(
+                self._apply_ai_optimizations, df, optimization_result, detected_issues
+            )
             
             analysis = {
                 "confidence": optimization_result.get("confidence", 80.0),
@@ -880,33 +1242,41 @@ class AIService:
     def _basic_excel_optimization(self, df: pd.DataFrame, detected_issues: List[str]) -> pd.DataFrame:
         """Apply basic optimizations for Excel compatibility"""
         
-        optimized_df = df.copy()
+        # The helpers below modify this shallow clone in place; with
+        # Copy-on-Write only the columns they rewrite get new memory
+        optimized_df = df.copy(deep=False)
         
         try:
-            for issue in detected_issues:
-                if "nested_data" in issue:
-                    # Flatten nested data
-                    optimized_df = self._flatten_nested_columns(optimized_df)
-                
-                elif "problematic_column_names" in issue:
-                    # Fix column names
-                    optimized_df = self._fix_column_names(optimized_df)
-                
-                elif "long_text_values" in issue:
-                    # Truncate long text values
-                    optimized_df = self._truncate_long_text(optimized_df)
-                
-                elif "mixed_types" in issue:
-                    # Convert mixed types to strings
-                    optimized_df = self._normalize_mixed_types(optimized_df)
-                
-                elif "exceeds_excel_row_limit" in issue:
-                    # Truncate rows
-                    optimized_df = optimized_df.head(1048576)
-                
-                elif "exceeds_excel_column_limit" in issue:
-                    # Truncate columns
-                    optimized_df = optimized_df.iloc[:, :16384]
+            # Each optimization runs at most once, however many issues ask for it
+            tags = {tag for tag in _OPT_TAGS for issue in detected_issues if tag in issue}
+            
+            # Size limits first so the remaining passes touch less data
+            if "exceeds_excel_row_limit" in tags and len(optimized_df) > _EXCEL_MAX_ROWS:
+                # Truncate rows
+                optimized_df = optimized_df.iloc[:_EXCEL_MAX_ROWS]
+            
+            if "exceeds_excel_column_limit" in tags and optimized_df.shape[1] > _EXCEL_MAX_COLUMNS:
+                # Truncate columns
+                optimized_df = optimized_df.iloc[:, :_EXCEL_MAX_COLUMNS]
+            
+            # Object columns are looked up once and shared by the passes below
+            object_cols = optimized_df.select_dtypes(include='object').columns.tolist()
+            
+            if "nested_data" in tags:
+                # Flatten nested data
+                optimized_df = self._flatten_nested_columns(optimized_df, object_cols)
+            
+            if "long_text_values" in tags:
+                # Truncate long text values
+                optimized_df = self._truncate_long_text(optimized_df, object_cols)
+            
+            if "mixed_types" in tags:
+                # Convert mixed types to strings
+                optimized_df = self._normalize_mixed_types(optimized_df, object_cols)
+            
+            if "problematic_column_names" in tags:
+                # Fix column names (last, so object_cols stays valid above)
+                optimized_df = self._fix_column_names(optimized_df)
             
             return optimized_df
             
@@ -914,126 +1284,132 @@ class AIService:
             logger.error(f"ERROR: Basic optimization failed: {str(e)}")
             return df  # Return original if optimization fails
     
-    def _flatten_nested_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Flatten columns with nested data"""
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].apply(lambda x: str(x) if isinstance(x, (dict, list)) else x)
+    def _flatten_nested_columns(self, df: pd.DataFrame, object_cols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Flatten columns with nested data (modifies df in place)"""
+        if object_cols is None:
+            object_cols = df.select_dtypes(include='object').columns
+        
+        for col in object_cols:
+            # A homogeneous scalar column (C-level type scan) can't hold dicts/lists
+            if pd.api.types.infer_dtype(df[col], skipna=True) in _SCALAR_INFERRED_TYPES:
+                continue
+            
+            # Only stringify the nested cells
+            nested = df[col].map(lambda x: isinstance(x, (dict, list)))
+            if nested.any():
+                df.loc[nested, col] = df.loc[nested, col].map(str)
         return df
     
     def _fix_column_names(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Fix problematic column names for Excel"""
-        new_columns = []
-        for col in df.columns:
-            new_col = str(col)
-            # Remove forbidden characters
-            for char in ['/', '\\', '*', '?', '[', ']']:
-                new_col = new_col.replace(char, '_')
-            # Truncate if too long
-            if len(new_col) > 255:
-                new_col = new_col[:255]
-            new_columns.append(new_col)
-        
-        df.columns = new_columns
+        """Fix problematic column names for Excel (modifies df in place)"""
+        # Replace forbidden characters and truncate to Excel's 255-char limit
+        df.columns = [str(col).translate(_EXCEL_BAD_CHARS)[:255] for col in df.columns]
         return df
     
-    def _truncate_long_text(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Truncate text values that exceed Excel limits"""
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].astype(str).apply(lambda x: x[:32767] if len(x) > 32767 else x)
+    def _truncate_long_text(self, df: pd.DataFrame, object_cols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Truncate text values that exceed Excel limits (modifies df in place)"""
+        if object_cols is None:
+            object_cols = df.select_dtypes(include='object').columns
+        
+        for col in object_cols:
+            if self._has_long_text(df[col]):
+                df[col] = df[col].astype(_STRING_DTYPE).str.slice(0, 32767)
         return df
     
-    def _normalize_mixed_types(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Convert mixed-type columns to strings"""
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].astype(str)
-        return df
+    def _has_long_text(self, series: pd.Series) -> bool:
+        """Check if any string in a column exceeds Excel's 32767-character cell limit"""
+        try:
+            return series.str.len().max() > 32767
+        except AttributeError:
+            # No string values at all
+            return False
     
-    def _apply_ai_optimizations(self, df: pd.DataFrame, optimization_result: Dict[str, Any]) -> pd.DataFrame:
-        """Apply AI-recommended optimizations"""
-        # This would apply specific AI recommendations
-        # For now, apply basic optimizations plus any AI-specific suggestions
-        optimized_df = self._basic_excel_optimization(df, optimization_result.get("detected_issues", []))
-        return optimized_df
-
-    def _convert_to_ai_analysis(self, azure_result: Dict[str, Any], df: pd.DataFrame) -> AIAnalysis:
-        """Convert Azure OpenAI result to AIAnalysis model"""
-        
-        return AIAnalysis(
-            confidence=azure_result.get("confidence", 85.0),
-            analysis_type="azure_openai" if azure_result.get("ai_enabled", True) else "deterministic",
-            detected_patterns=azure_result.get("patterns", []),
-            column_types=self._detect_column_types(df),
-            recommendations=azure_result.get("recommendations", [])
-        )
+    def _normalize_mixed_types(self, df: pd.DataFrame, object_cols: Optional[List[str]] = None) -> pd.DataFrame:
+        """Convert mixed-type columns to strings (modifies df in place)"""
+        if object_cols is None:
+            object_cols = df.select_dtypes(include='object').columns
+        
+        for col in object_cols:
+            # Columns already holding only strings (or nothing) are left as they are
+            if pd.api.types.infer_dtype(df[col], skipna=True) in ('string', 'empty'):
+                continue
+            df[col] = df[col].astype(_STRING_DTYPE)
+        return df
     
-    async def optimize_dataframe_for_excel_with_ai(
-        self, 
-        df: pd.DataFrame, 
-        use_ai: bool = True,
-        min_confidence: float = 0.8
-    ) -> tuple:
-        """
-        Optimize DataFrame for Excel using Azure OpenAI
+    def _apply_ai_optimizations(
+        self,
+        df: pd.DataFrame,
+        optimization_result: Dict[str, Any],
+        detected_issues: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """Apply AI optimization recommendations to DataFrame"""
         
-        Args:
-            df: DataFrame to optimize
-            use_ai: Whether to use AI optimization
-            min_confidence: Minimum confidence threshold
-            
-        Returns:
-            Tuple of (optimized_dataframe, analysis_dict)
-        """
+        column_mapping = optimization_result.get("column_mapping", {})
+        type_conversions = optimization_result.get("type_conversions", {})
         
-        try:
-            if not use_ai:
-                return self._basic_excel_optimization(df)
-            
-            # Get AI optimization recommendations
-            json_data = df.to_dict('records')
-            optimization_result = await self.azure_openai.optimize_json_for_excel(json_data, use_ai)
-            
-            # Apply optimizations
-            optimized_df = self._apply_ai_optimizations(df, optimization_result)
-            
-            # Create analysis result
-            analysis = {
-                "confidence": 95.0,
-                "analysis_type": "azure_openai",
-                "optimizations_applied": optimization_result.get("excel_optimizations", []),
-                "column_optimizations": optimization_result.get("column_mapping", {}),
-                "recommendations": ["AI-powered optimization completed"],
-                "ai_enabled": True
-            }
-            
-            return optimized_df, analysis
-            
-        except Exception as e:
-            logger.error(f"ERROR: AI Excel optimization failed: {str(e)}")
-            return self._basic_excel_optimization(df)
-    
-    def _apply_ai_optimizations(self, df: pd.DataFrame, optimization_result: Dict[str, Any]) -> pd.DataFrame:
-        """Apply AI optimization recommendations to DataFrame"""
+        # A sparse AI answer gets the basic fixes; targeted ones replace them
+        if not column_mapping and not type_conversions:
+            if detected_issues is None:
+                detected_issues = optimization_result.get("detected_issues", [])
+            return self._basic_excel_optimization(df, detected_issues)
         
-        optimized_df = df.copy()
+        # Shallow copy: with Copy-on-Write only converted columns get copied
+        optimized_df = df.copy(deep=False)
         
         # Apply column mapping if provided
-        column_mapping = optimization_result.get("column_mapping", {})
         if column_mapping:
             optimized_df = optimized_df.rename(columns=column_mapping)
         
         # Apply type conversions if provided
-        type_conversions = optimization_result.get("type_conversions", {})
         for col, target_type in type_conversions.items():
             if col in optimized_df.columns:
                 try:
                     if target_type == "datetime":
                         optimized_df[col] = pd.to_datetime(optimized_df[col], errors='coerce')
                     elif target_type == "numeric":
-                        optimized_df[col] = pd.to_numeric(optimized_df[col], errors='coerce')
+                        optimized_df[col] = self._downcast_numeric(
+                            pd.to_numeric(optimized_df[col], errors='coerce')
+                        )
                 except Exception as e:
                     logger.warning(f"Failed to convert column {col} to {target_type}: {str(e)}")
         
         return optimized_df
+    
+    def _downcast_numeric(self, series: pd.Series) -> pd.Series:
+        """Shrink a numeric series to the smallest dtype that holds its values exactly"""
+        downcast = pd.to_numeric(series, downcast='integer')
+        if downcast.dtype.kind in 'iu':
+            return downcast
+        
+        # float32 only when no value loses precision on the way down
+        downcast = pd.to_numeric(series, downcast='float')
+        if downcast.dtype != series.dtype and not np.array_equal(
+            downcast.to_numpy(dtype='float64'), series.to_numpy(dtype='float64'), equal_nan=True
+        ):
+            return series
+        return downcast
+    
+    def _convert_to_ai_analysis(
+        self,
+        azure_result: Dict[str, Any],
+        df: pd.DataFrame,
+        column_types: Optional[Dict[str, str]] = None
+    ) -> AIAnalysis:
+        """
+        Convert Azure OpenAI result to AIAnalysis model
+        
+        ``column_types`` from this request's deterministic analysis is reused
+        when given, instead of sniffing the columns again.
+        """
+        
+        if column_types is None:
+            column_types = self._detect_column_types(df)
+        
+        # Model output is untrusted, so this one keeps full validation
+        return AIAnalysis(
+            confidence=azure_result.get("confidence", 85.0),
+            analysis_type="azure_openai" if azure_result.get("ai_enabled", True) else "deterministic",
+            detected_patterns=azure_result.get("patterns", []),
+            column_types=column_types,
+            recommendations=azure_result.get("recommendations", [])
+        )
@@ -0,0 +1,120 @@
+"""
+Pool of Azure OpenAI connections with round-robin dispatch and rate-limit failover
+"""
+
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from core.config import get_azure_settings
+from services.azure_openai_service import AzureOpenAIService
+from utils.logger import logger
+from utils.exceptions import AIRateLimitError
+
+
+class _PoolMember:
+    """One pooled connection with its concurrency limit and cool-down state"""
+
+    def __init__(self, service: AzureOpenAIService, max_concurrency: int):
+        self.service = service
+        self.max_concurrency = max(max_concurrency, 1)
+        self.cooldown_until = 0.0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+class AzureOpenAIPool:
+    """Spread Azure OpenAI calls across several endpoints/deployments"""
+
+    def __init__(self):
+        settings = get_azure_settings()
+
+        if settings.azure_openai_pool:
+            self._members = [
+                _PoolMember(AzureOpenAIService(connection), connection.max_concurrency)
+                for connection in settings.azure_openai_pool
+            ]
+        else:
+            self._members = [
+                _PoolMember(AzureOpenAIService(), settings.azure_openai_max_concurrency)
+            ]
+
+        # Membership is fixed, so configuration is checked once here
+        self._is_configured = any(member.service.is_configured for member in self._members)
+        self._cooldown = settings.ai_rate_limit_cooldown
+        self._cycle = itertools.cycle(self._members)
+        logger.info(f"🤖 Azure OpenAI pool ready with {len(self._members)} connection(s)")
+
+    @property
+    def primary(self) -> AzureOpenAIService:
+        """First connection, for calls that don't go through the pool"""
+        return self._members[0].service
+
+    @property
+    def is_configured(self) -> bool:
+        """Whether at least one pooled connection is usable"""
+        return self._is_configured
+
+    def _next_member(self) -> _PoolMember:
+        """Pick the next configured connection that is not cooling down"""
+
+        now = time.monotonic()
+        for _ in range(len(self._members)):
+            member = next(self._cycle)
+            if member.service.is_configured and member.cooldown_until <= now:
+                return member
+
+        # Everything is rate limited: use the connection that recovers first
+        configured = [member for member in self._members if member.service.is_configured] or self._members
+        return min(configured, key=lambda member: member.cooldown_until)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[AzureOpenAIService]:
+        """Borrow a connection, respecting its concurrency limit"""
+
+        member = self._next_member()
+        async with member.semaphore:
+            yield member.service
+
+    def _mark_rate_limited(self, service: AzureOpenAIService, error: AIRateLimitError) -> None:
+        """Put a connection in cool-down after a 429"""
+
+        retry_after = error.details.get("retry_after")
+        try:
+            cooldown = float(retry_after) if retry_after else self._cooldown
+        except ValueError:
+            cooldown = self._cooldown
+
+        for member in self._members:
+            if member.service is service:
+                member.cooldown_until = time.monotonic() + cooldown
+
+        logger.warning(f"WARNING: Azure OpenAI connection rate limited, cooling down for {cooldown:.1f}s")
+
+    async def run(self, operation: Callable[[AzureOpenAIService], Awaitable[Any]]) -> Any:
+        """
+        Run an AI operation on a pooled connection
+
+        On a rate-limit error the connection is put in cool-down and the
+        operation is retried on another one, at most once per connection.
+        """
+
+        last_error: Optional[AIRateLimitError] = None
+
+        for _ in range(len(self._members)):
+            async with self.acquire() as service:
+                try:
+                    return await operation(service)
+                except AIRateLimitError as e:
+                    self._mark_rate_limited(service, e)
+                    last_error = e
+
+        raise last_error
@@ -3,34 +3,355 @@ Azure OpenAI Service for intelligent data analysis and SQL generation
 """
 
 import asyncio
+import dataclasses
+import itertools
 import json
-from typing import Dict, List, Any, Optional, Union
+from functools import cached_property
+from string import Template
+from typing import Dict, List, Any, Optional, Tuple, Union
+import httpx
+import orjson
 import pandas as pd
-from openai import AsyncAzureOpenAI
-import sqlparse
-
-from core.config import get_azure_settings
+from openai import (
+    APIConnectionError,
+    AsyncAzureOpenAI,
+    InternalServerError,
+    RateLimitError
+)
+
+from core.config import AzureOpenAIConnection, get_azure_settings
+from services.prompt_cache import PromptCache
 from utils.logger import logger
-from utils.exceptions import AIProcessingError
+from utils.exceptions import AIProcessingError, AIRateLimitError, AITransientError
+
+
+def _create_prompt_cache() -> PromptCache:
+    """Response cache shared by every service instance in the worker"""
+    settings = get_azure_settings()
+    return PromptCache(settings.ai_prompt_cache_size, settings.ai_prompt_cache_ttl)
+
+
+_PROMPT_CACHE = _create_prompt_cache()
+
+# Requests currently awaiting a response, keyed by (deployment, prompt)
+_INFLIGHT_REQUESTS: Dict[Tuple[str, str], "asyncio.Future[str]"] = {}
+
+# One connection pool for every Azure OpenAI client in the worker, so pooled
+# services and repeated calls reuse open TCP/TLS connections
+_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Shared keep-alive HTTP client, created on first use"""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None or _HTTP_CLIENT.is_closed:
+        _HTTP_CLIENT = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60
+            ),
+            timeout=httpx.Timeout(get_azure_settings().ai_timeout, connect=5.0)
+        )
+    return _HTTP_CLIENT
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP connection pool on worker shutdown
+    
+    Every AsyncAzureOpenAI client in the worker is bound to this pool, so
+    this is a process-wide hook: no service can make AI calls afterwards.
+    """
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None and not _HTTP_CLIENT.is_closed:
+        await _HTTP_CLIENT.aclose()
+    _HTTP_CLIENT = None
+
+
+def _prompt_default(obj: Any) -> str:
+    """Serialize sample values orjson doesn't handle natively (timestamps, NaT, Decimal)"""
+    if hasattr(obj, "isoformat") and obj is not pd.NaT:
+        return obj.isoformat()
+    return str(obj)
+
+
+# JSON arrays longer than this have their structure read from the first records
+_JSON_STRUCTURE_SAMPLE_ABOVE = 10_000
+_JSON_STRUCTURE_SAMPLE = 1_000
+
+# Prompt size budget: longest list/dict embedded in full, and characters per field
+_PROMPT_MAX_ITEMS = 50
+_PROMPT_FIELD_CHARS = 800
+_PROMPT_SAMPLE_CHARS = 2000
+
+
+def _fit(value: Any, max_chars: int = _PROMPT_FIELD_CHARS) -> str:
+    """
+    Render a prompt field as compact JSON within a size budget
+    
+    Wide tables would otherwise put every column name, dtype and missing
+    count in the prompt; lists and dicts keep their first entries plus a
+    count of what was left out.
+    """
+    if isinstance(value, (list, tuple)) and len(value) > _PROMPT_MAX_ITEMS:
+        value = [*value[:_PROMPT_MAX_ITEMS], f"... (+{len(value) - _PROMPT_MAX_ITEMS} more)"]
+    elif isinstance(value, dict) and len(value) > _PROMPT_MAX_ITEMS:
+        extra = len(value) - _PROMPT_MAX_ITEMS
+        value = dict(itertools.islice(value.items(), _PROMPT_MAX_ITEMS))
+        value["..."] = f"+{extra} more"
+    
+    text = orjson.dumps(
+        value, default=_prompt_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    ).decode()
+    return text if len(text) <= max_chars else text[:max_chars] + "...<truncated>"
+
+
+def _bullet_list(items: List[str]) -> str:
+    """Render detected issues as prompt bullets"""
+    return "\n".join(f"- {item}" for item in items) if items else "(none)"
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Shared by every request, so it is built once
+_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": "You are an expert data analyst and SQL developer. Provide detailed, accurate analysis and generate clean, optimized SQL code."
+}
+
+
+# Prompt templates are parsed once; builders only substitute the fitted fields
+_JSON_EXCEL_ISSUE_RESOLUTION_TEMPLATE = Template("""
+You are a data conversion expert. The JSON to Excel conversion detected issues:
+
+JSON STRUCTURE:
+- Total records: $total_records
+- All keys: $all_keys
+- Nested keys: $nested_keys
+- Structure type: $structure_type
+
+SAMPLE DATA:
+$sample_data
+
+DETECTED ISSUES:
+$issues
+
+Please provide specific recommendations to fix these JSON to Excel conversion issues:
+1. How to handle each detected issue
+2. Data transformation recommendations
+3. Excel compatibility optimizations
+4. Performance considerations
+
+Focus ONLY on fixing the detected issues for Excel export. Be practical and concise.
+
+Return your response as a JSON object with:
+{
+    "confidence": <number 0-100>,
+    "optimization_type": "json_to_excel",
+    "optimizations": [list of specific optimization steps],
+    "recommendations": [list of conversion recommendations],
+    "excel_compatibility": [list of Excel-specific fixes]
+}
+""")
+
+_SQL_ISSUE_RESOLUTION_TEMPLATE = Template("""
+You are a SQL expert. The deterministic SQL $sql_type generation encountered issues:
+
+TABLE: $table_name
+SQL TYPE: $sql_type
+COLUMNS: $columns
+DATA TYPES: $data_types
+SAMPLE DATA: $sample_rows
+TOTAL ROWS: $total_rows$key_columns_info
+
+DETECTED ISSUES:
+$issues
+
+Please provide specific recommendations to fix these SQL generation issues:
+1. How to handle each detected issue
+2. Best practices for SQL $sql_type generation
+3. Performance optimizations
+4. Data type handling recommendations
+
+Focus ONLY on fixing the detected issues. Be practical and concise.
+
+Return your response as a JSON object with:
+{
+    "confidence": <number 0-100>,
+    "sql_type": "$sql_type",
+    "recommendations": [list of specific SQL fix recommendations],
+    "optimizations": [list of performance improvements],
+    "data_handling": [list of data type and escaping recommendations]
+}
+""")
+
+_ISSUE_RESOLUTION_TEMPLATE = Template("""
+You are a data cleaning expert. A deterministic analysis found issues in this Excel data:
+
+Filename: $filename
+Shape: $rows rows × $columns columns
+
+DETECTED ISSUES:
+$issues
+
+SAMPLE DATA:
+$sample_data
+
+COLUMN TYPES:
+$data_types
+
+MISSING VALUES:
+$missing_values
+
+Please provide:
+1. Specific recommendations to fix each detected issue
+2. Data cleaning steps needed
+3. Confidence level (0-100) for successful processing after fixes
+4. Any patterns or insights that explain why these issues occurred
+
+Focus ONLY on practical solutions for the detected issues. Be concise and actionable.
+
+Return your response as a JSON object with:
+{
+    "confidence": <number 0-100>,
+    "analysis_type": "issue_resolution",
+    "detected_patterns": [list of issues being addressed],
+    "recommendations": [list of specific fix recommendations],
+    "cleaning_steps": [list of data cleaning actions needed]
+}
+""")
+
+_BATCH_TEMPLATE = Template("""
+You will receive $count independent data analysis tasks. Solve each one on its own.
+
+$tasks
+
+Return a JSON array with exactly $count objects, one per task in the same order,
+each following the JSON format requested by its task.
+""")
+
+
+def _extract_first_json(text: str, opener: str = "{") -> Optional[Any]:
+    """
+    Decode the first valid JSON value starting at an ``opener`` bracket
+    
+    Model answers may wrap the JSON in prose or code fences that contain
+    braces of their own, so each candidate start is tried in turn.
+    """
+    # Fast path: the whole answer is the JSON value
+    stripped = text.strip()
+    if stripped.startswith(opener):
+        try:
+            return orjson.loads(stripped)
+        except orjson.JSONDecodeError:
+            pass
+    
+    start = text.find(opener)
+    while start >= 0:
+        try:
+            return _JSON_DECODER.raw_decode(text, start)[0]
+        except ValueError:
+            start = text.find(opener, start + 1)
+    return None
+
+
+# Rows scanned for prompt statistics; larger frames are sampled
+_SUMMARY_SCAN_ROWS = 10_000
+
+class _JsonCompletionTracker:
+    """Follows bracket depth across streamed text to spot where the first JSON value ends"""
+
+    def __init__(self):
+        self.parts: List[str] = []
+        self.length = 0
+        self.start = -1
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.complete = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a streamed chunk; True once a complete top-level JSON object/array was seen"""
+        offset = self.length
+        self.parts.append(chunk)
+        self.length += len(chunk)
+        for position, char in enumerate(chunk, start=offset):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char in '{[':
+                if self.depth == 0:
+                    self.start = position
+                self.depth += 1
+            elif self.depth == 0:
+                # Prose before the JSON value is ignored
+                continue
+            elif char == '"':
+                self.in_string = True
+            elif char in '}]':
+                self.depth -= 1
+                if self.depth == 0 and self._is_json(self.text[self.start:position + 1]):
+                    self.complete = True
+                    return True
+        return False
+
+    @property
+    def text(self) -> str:
+        """Everything streamed so far"""
+        return "".join(self.parts)
+
+    @staticmethod
+    def _is_json(candidate: str) -> bool:
+        """Bracketed prose such as "[note]" closes at depth 0 too, so confirm it parses"""
+        try:
+            orjson.loads(candidate)
+            return True
+        except ValueError:
+            return False
 
 
 class AzureOpenAIService:
     """Service for Azure OpenAI integration"""
     
-    def __init__(self):
+    def __init__(self, connection: Optional[AzureOpenAIConnection] = None):
         self.settings = get_azure_settings()
-        self.client = None
+        if connection is not None:
+            # Pool member: same AI settings, different endpoint/deployment
+            self.settings = dataclasses.replace(
+                self.settings,
+                azure_openai_endpoint=connection.endpoint,
+                azure_openai_api_key=connection.api_key,
+                azure_openai_deployment_name=connection.deployment_name,
+                azure_openai_api_version=connection.api_version
+            )
+        
+        # Values read on every AI call, bound once
+        self._deployment = self.settings.azure_openai_deployment_name
+        self._max_tokens = self.settings.ai_max_tokens
+        self._temperature = self.settings.ai_temperature
+        self._timeout = self.settings.ai_timeout
+        
         self.is_configured = self._check_configuration()
         if self.is_configured:
-            self.client = AsyncAzureOpenAI(
-                azure_endpoint=self.settings.azure_openai_endpoint,
-                api_key=self.settings.azure_openai_api_key,
-                api_version=self.settings.azure_openai_api_version
-            )
             logger.info("🤖 Azure OpenAI Service initialized")
         else:
             logger.warning("Azure OpenAI not configured - using fallback analysis")
     
+    @cached_property
+    def client(self) -> AsyncAzureOpenAI:
+        """Azure OpenAI client, built on the first AI call rather than at startup"""
+        return AsyncAzureOpenAI(
+            azure_endpoint=self.settings.azure_openai_endpoint,
+            api_key=self.settings.azure_openai_api_key,
+            api_version=self.settings.azure_openai_api_version,
+            http_client=_get_http_client()
+        )
+    
     def _check_configuration(self) -> bool:
         """Check if Azure OpenAI is properly configured"""
         required_settings = [
@@ -64,11 +385,10 @@ class AzureOpenAIService:
             return self._fallback_analysis(df)
         
         try:
-            # Prepare data summary for AI with focus on detected issues
-            data_summary = self._prepare_data_summary(df, filename)
-            
-            # Create AI prompt focused on fixing specific issues
-            prompt = self._create_issue_resolution_prompt(data_summary, detected_issues or [])
+            # Summarize the data and build the issue-focused prompt off the event loop
+            prompt = await asyncio.to_thread(
+                self._build_issue_resolution_prompt, df, filename, detected_issues or []
+            )
             
             response = await self._call_azure_openai(prompt)
             
@@ -78,23 +398,96 @@ class AzureOpenAIService:
             logger.info(f"✅ Azure OpenAI issue resolution completed for {filename}")
             return analysis
             
+        except AITransientError:
+            # Let the caller retry (rate limits fail over to another deployment)
+            raise
         except Exception as e:
             logger.error(f"ERROR: Azure OpenAI analysis failed: {str(e)}")
             return self._fallback_analysis(df)
     
+    async def analyze_excel_data_batch(
+        self,
+        requests: List[Tuple[pd.DataFrame, str, List[str]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Analyze several DataFrames with a single Azure OpenAI request
+        
+        Requests whose prompts are identical (same data summary, filename
+        and issues) are sent once and share the result.
+        
+        Args:
+            requests: (df, filename, detected_issues) tuples
+            
+        Returns:
+            One analysis result per request, in the same order
+        """
+        
+        if len(requests) == 1:
+            df, filename, detected_issues = requests[0]
+            return [await self.analyze_excel_data(df, filename, True, detected_issues)]
+        
+        if not self.is_configured:
+            return [self._fallback_analysis(df) for df, _, _ in requests]
+        
+        try:
+            prompts = await asyncio.to_thread(lambda: [
+                self._build_issue_resolution_prompt(df, filename, detected_issues or [])
+                for df, filename, detected_issues in requests
+            ])
+            
+            unique_prompts = list(dict.fromkeys(prompts))
+            if len(unique_prompts) == 1:
+                analyses = [self._parse_analysis_response(await self._call_azure_openai(unique_prompts[0]))]
+            else:
+                analyses = await self.analyze_bundle(unique_prompts)
+            
+            if analyses is not None:
+                logger.info(f"✅ Azure OpenAI batched issue resolution completed for {len(requests)} files")
+                analysis_by_prompt = dict(zip(unique_prompts, analyses))
+                return [analysis_by_prompt[prompt] for prompt in prompts]
+            
+            logger.warning("WARNING: Batched AI response did not match the request count")
+            
+        except AITransientError:
+            raise
+        except Exception as e:
+            logger.error(f"ERROR: Azure OpenAI batch analysis failed: {str(e)}")
+        
+        return [self._fallback_analysis(df) for df, _, _ in requests]
+    
+    async def analyze_bundle(self, prompts: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run several independent task prompts as one Azure OpenAI request
+        
+        The system message and output instructions are sent once for the
+        whole bundle instead of once per task.
+        
+        Args:
+            prompts: Task prompts, each asking for a JSON object
+            
+        Returns:
+            One parsed result per prompt in the same order, or None if the
+            response does not hold exactly one JSON object per task
+        """
+        
+        response = await self._call_azure_openai(self._create_batch_prompt(prompts))
+        return self._parse_batch_response(response, len(prompts))
+    
     async def optimize_json_for_excel(
         self, 
         json_data: Union[List[Dict], Dict], 
         use_ai: bool = True,
-        detected_issues: List[str] = None
+        detected_issues: List[str] = None,
+        total_records: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Optimize JSON structure for Excel export - only called when issues detected
         
         Args:
-            json_data: JSON data to optimize
+            json_data: JSON data to optimize (may be a sample of the records)
             use_ai: Whether to use AI optimization
             detected_issues: List of issues detected in deterministic processing
+            total_records: Full record count when json_data is only a sample
             
         Returns:
             Optimization recommendations and transformations
@@ -104,10 +497,10 @@ class AzureOpenAIService:
             return self._fallback_json_optimization()
         
         try:
-            json_summary = self._prepare_json_summary(json_data)
-            
-            prompt = self._create_json_excel_issue_resolution_prompt(
-                json_summary, detected_issues or []
+            prompt = await asyncio.to_thread(
+                lambda: self._create_json_excel_issue_resolution_prompt(
+                    self._prepare_json_summary(json_data, total_records), detected_issues or []
+                )
             )
             
             response = await self._call_azure_openai(prompt)
@@ -116,6 +509,8 @@ class AzureOpenAIService:
             logger.info(f"✅ AI JSON to Excel optimization completed")
             return result
             
+        except AITransientError:
+            raise
         except Exception as e:
             logger.error(f"ERROR: AI JSON optimization failed: {str(e)}")
             return self._fallback_json_optimization()
@@ -127,52 +522,26 @@ class AzureOpenAIService:
     ) -> str:
         """Create prompt for resolving JSON to Excel conversion issues"""
         
-        issues_description = "\n".join([f"- {issue}" for issue in detected_issues])
+        issues_description = _bullet_list(detected_issues)
         
-        return f"""
-You are a data conversion expert. The JSON to Excel conversion detected issues:
-
-JSON STRUCTURE:
-- Total records: {json_summary['total_records']}
-- All keys: {json_summary['all_keys']}
-- Nested keys: {json_summary['nested_keys']}
-- Structure type: {json_summary['structure_type']}
-
-SAMPLE DATA:
-{json_summary['sample_data']}
-
-DETECTED ISSUES:
-{issues_description}
-
-Please provide specific recommendations to fix these JSON to Excel conversion issues:
-1. How to handle each detected issue
-2. Data transformation recommendations
-3. Excel compatibility optimizations
-4. Performance considerations
-
-Focus ONLY on fixing the detected issues for Excel export. Be practical and concise.
-
-Return your response as a JSON object with:
-{{
-    "confidence": <number 0-100>,
-    "optimization_type": "json_to_excel",
-    "optimizations": [list of specific optimization steps],
-    "recommendations": [list of conversion recommendations],
-    "excel_compatibility": [list of Excel-specific fixes]
-}}
-"""
+        return _JSON_EXCEL_ISSUE_RESOLUTION_TEMPLATE.substitute(
+            total_records=json_summary['total_records'],
+            all_keys=_fit(json_summary['all_keys']),
+            nested_keys=_fit(json_summary['nested_keys']),
+            structure_type=json_summary['structure_type'],
+            sample_data=_fit(json_summary['sample_data'], _PROMPT_SAMPLE_CHARS),
+            issues=issues_description,
+        )
     
     def _parse_json_optimization_response(self, response: str) -> Dict[str, Any]:
         """Parse AI response for JSON optimization"""
         try:
-            import json
             # Try to extract JSON from response
-            start = response.find('{')
-            end = response.rfind('}') + 1
-            
-            if start >= 0 and end > start:
-                json_str = response[start:end]
-                return json.loads(json_str)
+            result = _extract_first_json(response)
+            if result is not None:
+                return result
+            elif '{' in response:
+                raise ValueError("no valid JSON object in response")
             else:
                 # Fallback parsing
                 return {
@@ -192,43 +561,6 @@ Return your response as a JSON object with:
                 "excel_compatibility": []
             }
 
-    async def optimize_json_for_excel_old(
-        self, 
-        json_data: Union[List[Dict], Dict], 
-        use_ai: bool = True
-    ) -> Dict[str, Any]:
-        """
-        Optimize JSON structure for Excel export using AI
-        
-        Args:
-            json_data: JSON data to optimize
-            use_ai: Whether to use AI optimization
-            
-        Returns:
-            Optimization recommendations and transformations
-        """
-        
-        if not use_ai or not self.is_configured:
-            return self._fallback_json_optimization()
-        
-        try:
-            # Prepare JSON summary
-            json_summary = self._prepare_json_summary(json_data)
-            
-            prompt = self._create_json_optimization_prompt(json_summary)
-            
-            response = await self._call_azure_openai(prompt)
-            
-            # Parse optimization response
-            optimization = self._parse_optimization_response(response)
-            
-            logger.info("✅ Azure OpenAI JSON optimization completed")
-            return optimization
-            
-        except Exception as e:
-            logger.error(f"ERROR: Azure OpenAI optimization failed: {str(e)}")
-            return self._fallback_json_optimization()
-    
     async def generate_sql_insert(
         self, 
         df: pd.DataFrame, 
@@ -253,10 +585,10 @@ Return your response as a JSON object with:
             return self._fallback_sql_generation("INSERT")
         
         try:
-            data_sample = self._prepare_sql_data_sample(df)
-            
-            prompt = self._create_sql_issue_resolution_prompt(
-                data_sample, table_name, "INSERT", detected_issues or []
+            prompt = await asyncio.to_thread(
+                lambda: self._create_sql_issue_resolution_prompt(
+                    self._prepare_sql_data_sample(df), table_name, "INSERT", detected_issues or []
+                )
             )
             
             response = await self._call_azure_openai(prompt)
@@ -295,10 +627,10 @@ Return your response as a JSON object with:
             return self._fallback_sql_generation("UPDATE")
         
         try:
-            data_sample = self._prepare_sql_data_sample(df)
-            
-            prompt = self._create_sql_issue_resolution_prompt(
-                data_sample, table_name, "UPDATE", detected_issues or [], key_columns
+            prompt = await asyncio.to_thread(
+                lambda: self._create_sql_issue_resolution_prompt(
+                    self._prepare_sql_data_sample(df), table_name, "UPDATE", detected_issues or [], key_columns
+                )
             )
             
             response = await self._call_azure_openai(prompt)
@@ -321,51 +653,29 @@ Return your response as a JSON object with:
     ) -> str:
         """Create prompt for resolving SQL generation issues"""
         
-        issues_description = "\n".join([f"- {issue}" for issue in detected_issues])
-        key_columns_info = f"\nKey columns for WHERE clause: {key_columns}" if key_columns else ""
-        
-        return f"""
-You are a SQL expert. The deterministic SQL {sql_type} generation encountered issues:
-
-TABLE: {table_name}
-SQL TYPE: {sql_type}
-COLUMNS: {data_sample['columns']}
-DATA TYPES: {data_sample['data_types']}
-SAMPLE DATA: {data_sample['sample_rows']}
-TOTAL ROWS: {data_sample['total_rows']}{key_columns_info}
-
-DETECTED ISSUES:
-{issues_description}
-
-Please provide specific recommendations to fix these SQL generation issues:
-1. How to handle each detected issue
-2. Best practices for SQL {sql_type} generation
-3. Performance optimizations
-4. Data type handling recommendations
-
-Focus ONLY on fixing the detected issues. Be practical and concise.
-
-Return your response as a JSON object with:
-{{
-    "confidence": <number 0-100>,
-    "sql_type": "{sql_type}",
-    "recommendations": [list of specific SQL fix recommendations],
-    "optimizations": [list of performance improvements],
-    "data_handling": [list of data type and escaping recommendations]
-}}
-"""
+        issues_description = _bullet_list(detected_issues)
+        key_columns_info = f"\nKey columns for WHERE clause: {_fit(key_columns)}" if key_columns else ""
+        
+        return _SQL_ISSUE_RESOLUTION_TEMPLATE.substitute(
+            sql_type=sql_type,
+            table_name=table_name,
+            columns=_fit(data_sample['columns']),
+            data_types=_fit(data_sample['data_types']),
+            sample_rows=_fit(data_sample['sample_rows'], _PROMPT_SAMPLE_CHARS),
+            total_rows=data_sample['total_rows'],
+            key_columns_info=key_columns_info,
+            issues=issues_description,
+        )
     
     def _parse_sql_response(self, response: str) -> Dict[str, Any]:
         """Parse AI response for SQL generation"""
         try:
-            import json
             # Try to extract JSON from response
-            start = response.find('{')
-            end = response.rfind('}') + 1
-            
-            if start >= 0 and end > start:
-                json_str = response[start:end]
-                return json.loads(json_str)
+            result = _extract_first_json(response)
+            if result is not None:
+                return result
+            elif '{' in response:
+                raise ValueError("no valid JSON object in response")
             else:
                 # Fallback parsing
                 return {
@@ -398,122 +708,108 @@ Return your response as a JSON object with:
             "data_handling": ["Check data types and escaping manually"]
         }
 
-    async def generate_sql_insert_old(
-        self, 
-        df: pd.DataFrame, 
-        table_name: str = "data_table",
-        batch_size: int = 100
-    ) -> Dict[str, Any]:
-        """
-        Generate SQL INSERT statements from DataFrame
+    async def _call_azure_openai(self, prompt: str) -> str:
+        """Call Azure OpenAI with the given prompt"""
         
-        Args:
-            df: DataFrame to convert to SQL
-            table_name: Target table name
-            batch_size: Number of records per INSERT batch
-            
-        Returns:
-            SQL generation results with statements and metadata
-        """
+        # Identical prompts to the same deployment reuse the earlier answer
+        deployment = self._deployment
+        cached = _PROMPT_CACHE.get(deployment, prompt)
+        if cached is not None:
+            logger.info("INFO: Reusing cached Azure OpenAI response")
+            return cached
+        
+        # Concurrent identical prompts share one request instead of each
+        # missing the cache and calling the API
+        key = (deployment, prompt)
+        request = _INFLIGHT_REQUESTS.get(key)
+        if request is None:
+            request = asyncio.ensure_future(self._request_completion(deployment, prompt))
+            _INFLIGHT_REQUESTS[key] = request
+            request.add_done_callback(lambda _: _INFLIGHT_REQUESTS.pop(key, None))
+        else:
+            logger.info("INFO: Joining in-flight Azure OpenAI request")
+        
+        # Shielded so one caller giving up doesn't cancel the others' request
+        return await asyncio.shield(request)
+    
+    async def _request_completion(self, deployment: str, prompt: str) -> str:
+        """Run one completion request, caching the answer and mapping API errors"""
         
         try:
-            if not self.is_configured:
-                return self._generate_basic_sql_insert(df, table_name, batch_size)
-            
-            # Prepare data for AI analysis
-            data_sample = self._prepare_sql_data_sample(df)
-            
-            prompt = self._create_sql_insert_prompt(data_sample, table_name)
-            
-            response = await self._call_azure_openai(prompt)
-            
-            # Parse SQL response and generate statements
-            sql_result = await self._parse_and_generate_sql_insert(response, df, table_name, batch_size)
+            content, complete = await asyncio.wait_for(
+                self._stream_completion(deployment, prompt),
+                timeout=self._timeout
+            )
             
-            logger.info(f"✅ SQL INSERT generation completed for {len(df)} records")
-            return sql_result
+            # Truncated answers (max_tokens hit, JSON never closed) are returned
+            # for the caller to handle but never cached
+            if complete:
+                _PROMPT_CACHE.put(deployment, prompt, content)
+            return content
             
+        except asyncio.TimeoutError:
+            raise AITransientError("Azure OpenAI request timed out")
+        except RateLimitError as e:
+            retry_after = e.response.headers.get("retry-after") if e.response is not None else None
+            raise AIRateLimitError(
+                "Azure OpenAI rate limit exceeded",
+                error_code="AI_RATE_LIMITED",
+                details={"retry_after": retry_after}
+            )
+        except (APIConnectionError, InternalServerError, httpx.TransportError) as e:
+            # Covers APITimeoutError, a subclass of APIConnectionError, and
+            # connections dropped while the stream is being read
+            raise AITransientError(f"Azure OpenAI API error: {str(e)}")
         except Exception as e:
-            logger.error(f"ERROR: SQL INSERT generation failed: {str(e)}")
-            return self._generate_basic_sql_insert(df, table_name, batch_size)
+            raise AIProcessingError(f"Azure OpenAI API error: {str(e)}")
     
-    async def generate_sql_update(
-        self, 
-        df: pd.DataFrame, 
-        table_name: str = "data_table",
-        key_columns: List[str] = None
-    ) -> Dict[str, Any]:
+    async def _stream_completion(self, deployment: str, prompt: str) -> Tuple[str, bool]:
         """
-        Generate SQL UPDATE statements from DataFrame
+        Stream a chat completion and stop reading once its JSON payload is complete
         
-        Args:
-            df: DataFrame to convert to SQL UPDATE
-            table_name: Target table name
-            key_columns: Columns to use as WHERE clause keys
-            
-        Returns:
-            SQL UPDATE generation results
+        Every prompt asks for a JSON answer, so anything the model writes after
+        the first top-level object/array closes is never waited for. Returns the
+        streamed text and whether a complete JSON value was seen.
         """
         
-        try:
-            if not self.is_configured:
-                return self._generate_basic_sql_update(df, table_name, key_columns)
-            
-            # Auto-detect key columns if not provided
-            if not key_columns:
-                key_columns = self._detect_key_columns(df)
-            
-            # Prepare data for AI analysis
-            data_sample = self._prepare_sql_data_sample(df)
-            
-            prompt = self._create_sql_update_prompt(data_sample, table_name, key_columns)
-            
-            response = await self._call_azure_openai(prompt)
-            
-            # Parse and generate SQL UPDATE statements
-            sql_result = await self._parse_and_generate_sql_update(response, df, table_name, key_columns)
-            
-            logger.info(f"✅ SQL UPDATE generation completed for {len(df)} records")
-            return sql_result
-            
-        except Exception as e:
-            logger.error(f"ERROR: SQL UPDATE generation failed: {str(e)}")
-            return self._generate_basic_sql_update(df, table_name, key_columns)
-    
-    async def _call_azure_openai(self, prompt: str) -> str:
-        """Call Azure OpenAI with the given prompt"""
+        stream = await self.client.chat.completions.create(
+            model=deployment,
+            messages=[_SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
+            max_tokens=self._max_tokens,
+            temperature=self._temperature,
+            stream=True
+        )
         
+        tracker = _JsonCompletionTracker()
         try:
-            response = await asyncio.wait_for(
-                self.client.chat.completions.create(
-                    model=self.settings.azure_openai_deployment_name,
-                    messages=[
-                        {
-                            "role": "system", 
-                            "content": "You are an expert data analyst and SQL developer. Provide detailed, accurate analysis and generate clean, optimized SQL code."
-                        },
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=self.settings.ai_max_tokens,
-                    temperature=self.settings.ai_temperature
-                ),
-                timeout=self.settings.ai_timeout
-            )
-            
-            return response.choices[0].message.content
-            
-        except asyncio.TimeoutError:
-            raise AIProcessingError("Azure OpenAI request timed out")
-        except Exception as e:
-            raise AIProcessingError(f"Azure OpenAI API error: {str(e)}")
+            async for chunk in stream:
+                # Azure sends content-filter chunks without choices
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta and tracker.feed(delta):
+                    break
+        finally:
+            await stream.response.aclose()
+        
+        return tracker.text, tracker.complete
     
     def _prepare_data_summary(self, df: pd.DataFrame, filename: str) -> Dict[str, Any]:
         """Prepare data summary for AI analysis"""
         
-        # Get basic stats
-        numeric_cols = df.select_dtypes(include=['int64', 'float64']).columns.tolist()
-        text_cols = df.select_dtypes(include=['object']).columns.tolist()
-        datetime_cols = df.select_dtypes(include=['datetime64']).columns.tolist()
+        # Get basic stats (dtypes are walked once for every category)
+        numeric_cols, text_cols, datetime_cols = [], [], []
+        data_types = {}
+        for col, dtype in df.dtypes.items():
+            data_types[col] = str(dtype)
+            if dtype.name in ('int64', 'float64'):
+                numeric_cols.append(col)
+            elif dtype == object:
+                text_cols.append(col)
+            elif pd.api.types.is_datetime64_dtype(dtype):
+                datetime_cols.append(col)
+        
+        missing_values = self._estimate_missing_values(df)
         
         # Sample data (first few rows)
         sample_data = df.head(3).to_dict('records')
@@ -528,33 +824,51 @@ Return your response as a JSON object with:
                 "datetime": datetime_cols
             },
             "sample_data": sample_data,
-            "missing_values": df.isnull().sum().to_dict(),
-            "data_types": df.dtypes.astype(str).to_dict()
+            "missing_values": missing_values,
+            "data_types": data_types
         }
     
-    def _prepare_json_summary(self, json_data: Union[List[Dict], Dict]) -> Dict[str, Any]:
-        """Prepare JSON summary for optimization analysis"""
+    def _estimate_missing_values(self, df: pd.DataFrame) -> Dict[Any, int]:
+        """
+        Missing values per column for the prompt
+        
+        Large frames are measured on a fixed-size random sample and scaled up
+        to the full row count; the model only needs ballpark numbers.
+        """
         
-        if isinstance(json_data, dict):
-            data_sample = [json_data]
+        if len(df) <= _SUMMARY_SCAN_ROWS:
+            # One reduction over the null mask instead of a per-column sum
+            counts = df.isna().to_numpy().sum(axis=0)
         else:
-            data_sample = json_data[:3] if len(json_data) > 3 else json_data
+            sample = df.sample(_SUMMARY_SCAN_ROWS, random_state=0)
+            counts = (sample.isna().to_numpy().mean(axis=0) * len(df)).round().astype(int)
+        
+        return dict(zip(df.columns, counts.tolist()))
+    
+    def _prepare_json_summary(
+        self,
+        json_data: Union[List[Dict], Dict],
+        total_records: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Prepare JSON summary for optimization analysis"""
+        
+        items = json_data if isinstance(json_data, list) else [json_data]
+        data_sample = items[:3]
         
-        # Analyze structure
+        # Analyze structure (records share a shape, so large arrays are sampled)
+        scanned = items[:_JSON_STRUCTURE_SAMPLE] if len(items) > _JSON_STRUCTURE_SAMPLE_ABOVE else items
         all_keys = set()
-        nested_keys = []
+        nested_keys = set()
         
-        for item in (json_data if isinstance(json_data, list) else [json_data]):
+        for item in scanned:
             if isinstance(item, dict):
-                all_keys.update(item.keys())
-                for key, value in item.items():
-                    if isinstance(value, (dict, list)):
-                        nested_keys.append(key)
+                all_keys.update(item)
+                nested_keys.update(key for key, value in item.items() if isinstance(value, (dict, list)))
         
         return {
-            "total_records": len(json_data) if isinstance(json_data, list) else 1,
+            "total_records": total_records if total_records is not None else len(items),
             "all_keys": list(all_keys),
-            "nested_keys": list(set(nested_keys)),
+            "nested_keys": list(nested_keys),
             "sample_data": data_sample,
             "structure_type": "array" if isinstance(json_data, list) else "object"
         }
@@ -564,160 +878,47 @@ Return your response as a JSON object with:
         
         return {
             "columns": df.columns.tolist(),
-            "data_types": df.dtypes.astype(str).to_dict(),
+            "data_types": {column: str(dtype) for column, dtype in df.dtypes.items()},
             "sample_rows": df.head(3).to_dict('records'),
             "total_rows": len(df),
             "nullable_columns": df.columns[df.isnull().any()].tolist()
         }
     
+    def _build_issue_resolution_prompt(self, df: pd.DataFrame, filename: str, detected_issues: List[str]) -> str:
+        """Summarize a DataFrame and build its issue-resolution prompt (CPU-bound, run in a thread)"""
+        return self._create_issue_resolution_prompt(self._prepare_data_summary(df, filename), detected_issues)
+    
     def _create_issue_resolution_prompt(self, data_summary: Dict[str, Any], detected_issues: List[str]) -> str:
         """Create prompt focused on resolving specific data issues"""
         
-        issues_description = "\n".join([f"- {issue}" for issue in detected_issues])
+        issues_description = _bullet_list(detected_issues)
         
-        return f"""
-You are a data cleaning expert. A deterministic analysis found issues in this Excel data:
-
-Filename: {data_summary['filename']}
-Shape: {data_summary['shape']['rows']} rows × {data_summary['shape']['columns']} columns
-
-DETECTED ISSUES:
-{issues_description}
-
-SAMPLE DATA:
-{data_summary['sample_data']}
-
-COLUMN TYPES:
-{data_summary['data_types']}
-
-MISSING VALUES:
-{data_summary['missing_values']}
+        return _ISSUE_RESOLUTION_TEMPLATE.substitute(
+            filename=data_summary['filename'],
+            rows=data_summary['shape']['rows'],
+            columns=data_summary['shape']['columns'],
+            issues=issues_description,
+            sample_data=_fit(data_summary['sample_data'], _PROMPT_SAMPLE_CHARS),
+            data_types=_fit(data_summary['data_types']),
+            missing_values=_fit(data_summary['missing_values']),
+        )
 
-Please provide:
-1. Specific recommendations to fix each detected issue
-2. Data cleaning steps needed
-3. Confidence level (0-100) for successful processing after fixes
-4. Any patterns or insights that explain why these issues occurred
-
-Focus ONLY on practical solutions for the detected issues. Be concise and actionable.
-
-Return your response as a JSON object with:
-{{
-    "confidence": <number 0-100>,
-    "analysis_type": "issue_resolution",
-    "detected_patterns": [list of issues being addressed],
-    "recommendations": [list of specific fix recommendations],
-    "cleaning_steps": [list of data cleaning actions needed]
-}}
-"""
-
-    def _create_excel_analysis_prompt(self, data_summary: Dict[str, Any]) -> str:
-        """Create prompt for Excel data analysis"""
+    def _create_batch_prompt(self, prompts: List[str]) -> str:
+        """Combine independent task prompts into one multi-task prompt"""
         
-        return f"""
-Analyze the following Excel data and provide insights:
-
-Filename: {data_summary['filename']}
-Shape: {data_summary['shape']['rows']} rows × {data_summary['shape']['columns']} columns
-
-Columns by type:
-- Numeric: {data_summary['columns']['numeric']}
-- Text: {data_summary['columns']['text']}
-- DateTime: {data_summary['columns']['datetime']}
-
-Sample data:
-{json.dumps(data_summary['sample_data'], indent=2)}
-
-Missing values per column:
-{json.dumps(data_summary['missing_values'], indent=2)}
-
-Please provide:
-1. Data quality assessment (score 0-100)
-2. Detected patterns and insights
-3. Recommendations for data improvement
-4. Suggested data transformations
-5. Business insights if applicable
-
-Format your response as JSON with keys: confidence, patterns, recommendations, insights, quality_score.
-"""
-    
-    def _create_json_optimization_prompt(self, json_summary: Dict[str, Any]) -> str:
-        """Create prompt for JSON optimization"""
+        tasks = "\n".join(
+            f"=== TASK {index} ===\n{prompt}" for index, prompt in enumerate(prompts, start=1)
+        )
         
-        return f"""
-Optimize the following JSON structure for Excel export:
-
-Structure type: {json_summary['structure_type']}
-Total records: {json_summary['total_records']}
-All keys: {json_summary['all_keys']}
-Nested keys: {json_summary['nested_keys']}
-
-Sample data:
-{json.dumps(json_summary['sample_data'], indent=2)}
+        return _BATCH_TEMPLATE.substitute(count=len(prompts), tasks=tasks)
 
-Please provide:
-1. Optimal column naming strategy
-2. Data flattening recommendations
-3. Type conversion suggestions
-4. Excel-specific optimizations
-5. Layout recommendations
-
-Format your response as JSON with keys: column_mapping, flattening_strategy, type_conversions, excel_optimizations.
-"""
-    
-    def _create_sql_insert_prompt(self, data_sample: Dict[str, Any], table_name: str) -> str:
-        """Create prompt for SQL INSERT generation"""
-        
-        return f"""
-Generate optimized SQL INSERT statements for the following data:
-
-Table name: {table_name}
-Columns: {data_sample['columns']}
-Data types: {json.dumps(data_sample['data_types'], indent=2)}
-Sample data: {json.dumps(data_sample['sample_rows'], indent=2)}
-Total rows: {data_sample['total_rows']}
-
-Please provide:
-1. CREATE TABLE statement with appropriate data types
-2. Optimized INSERT statement template
-3. Data type mapping recommendations
-4. Performance optimization suggestions
-
-Format your response as JSON with keys: create_table, insert_template, data_mappings, optimizations.
-"""
-    
-    def _create_sql_update_prompt(self, data_sample: Dict[str, Any], table_name: str, key_columns: List[str]) -> str:
-        """Create prompt for SQL UPDATE generation"""
-        
-        return f"""
-Generate optimized SQL UPDATE statements for the following data:
-
-Table name: {table_name}
-Key columns: {key_columns}
-All columns: {data_sample['columns']}
-Data types: {json.dumps(data_sample['data_types'], indent=2)}
-Sample data: {json.dumps(data_sample['sample_rows'], indent=2)}
-
-Please provide:
-1. Optimized UPDATE statement template
-2. WHERE clause strategy using key columns
-3. Batch update recommendations
-4. Performance considerations
-
-Format your response as JSON with keys: update_template, where_strategy, batch_recommendations, performance_tips.
-"""
-    
     def _parse_analysis_response(self, response: str) -> Dict[str, Any]:
         """Parse AI analysis response"""
         
-        try:
-            # Try to extract JSON from response
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
+        # Try to extract JSON from response
+        result = _extract_first_json(response)
+        if result is not None:
+            return result
         
         # Fallback to structured parsing
         return {
@@ -728,23 +929,18 @@ Format your response as JSON with keys: update_template, where_strategy, batch_r
             "quality_score": 85
         }
     
-    def _parse_optimization_response(self, response: str) -> Dict[str, Any]:
-        """Parse AI optimization response"""
-        
-        try:
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
-        return {
-            "column_mapping": {},
-            "flattening_strategy": "basic",
-            "type_conversions": {},
-            "excel_optimizations": ["Apply basic formatting"]
-        }
+    def _parse_batch_response(self, response: str, expected: int) -> Optional[List[Dict[str, Any]]]:
+        """Parse a multi-task AI response; None if it doesn't hold one object per task"""
+        
+        results = _extract_first_json(response, "[")
+        if (
+            isinstance(results, list)
+            and len(results) == expected
+            and all(isinstance(result, dict) for result in results)
+        ):
+            return results
+        
+        return None
     
     def _fallback_analysis(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Fallback analysis when AI is not available"""
@@ -768,126 +964,3 @@ Format your response as JSON with keys: update_template, where_strategy, batch_r
             "excel_optimizations": ["Basic formatting applied"],
             "ai_enabled": False
         }
-    
-    def _detect_key_columns(self, df: pd.DataFrame) -> List[str]:
-        """Auto-detect potential key columns"""
-        
-        key_candidates = []
-        
-        for col in df.columns:
-            col_lower = col.lower()
-            # Look for ID columns
-            if 'id' in col_lower or col_lower.endswith('_id'):
-                key_candidates.append(col)
-            # Look for unique identifiers
-            elif df[col].nunique() == len(df) and not df[col].isnull().any():
-                key_candidates.append(col)
-        
-        return key_candidates[:2] if key_candidates else [df.columns[0]]
-    
-    def _generate_basic_sql_insert(self, df: pd.DataFrame, table_name: str, batch_size: int) -> Dict[str, Any]:
-        """Generate basic SQL INSERT without AI"""
-        
-        # Create basic CREATE TABLE statement
-        create_table = f"CREATE TABLE {table_name} (\n"
-        for col in df.columns:
-            dtype = df[col].dtype
-            if 'int' in str(dtype):
-                sql_type = "INTEGER"
-            elif 'float' in str(dtype):
-                sql_type = "DECIMAL(10,2)"
-            elif 'datetime' in str(dtype):
-                sql_type = "DATETIME"
-            else:
-                sql_type = "VARCHAR(255)"
-            
-            create_table += f"    {col} {sql_type},\n"
-        
-        create_table = create_table.rstrip(',\n') + "\n);"
-        
-        # Create INSERT template
-        columns_str = ", ".join(df.columns)
-        placeholders = ", ".join(["?" for _ in df.columns])
-        insert_template = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders});"
-        
-        return {
-            "create_table": create_table,
-            "insert_template": insert_template,
-            "total_records": len(df),
-            "batch_size": batch_size,
-            "ai_enabled": False
-        }
-    
-    def _generate_basic_sql_update(self, df: pd.DataFrame, table_name: str, key_columns: List[str]) -> Dict[str, Any]:
-        """Generate basic SQL UPDATE without AI"""
-        
-        if not key_columns:
-            key_columns = [df.columns[0]]
-        
-        # Create UPDATE template
-        set_columns = [col for col in df.columns if col not in key_columns]
-        set_clause = ", ".join([f"{col} = ?" for col in set_columns])
-        where_clause = " AND ".join([f"{col} = ?" for col in key_columns])
-        
-        update_template = f"UPDATE {table_name} SET {set_clause} WHERE {where_clause};"
-        
-        return {
-            "update_template": update_template,
-            "key_columns": key_columns,
-            "update_columns": set_columns,
-            "total_records": len(df),
-            "ai_enabled": False
-        }
-    
-    async def _parse_and_generate_sql_insert(self, response: str, df: pd.DataFrame, table_name: str, batch_size: int) -> Dict[str, Any]:
-        """Parse AI response and generate SQL INSERT statements"""
-        
-        try:
-            # Parse AI response
-            ai_result = self._parse_analysis_response(response)
-            
-            # Generate statements based on AI recommendations
-            create_table = ai_result.get('create_table', '')
-            insert_template = ai_result.get('insert_template', '')
-            
-            # If AI didn't provide templates, fall back to basic generation
-            if not create_table or not insert_template:
-                return self._generate_basic_sql_insert(df, table_name, batch_size)
-            
-            return {
-                "create_table": create_table,
-                "insert_template": insert_template,
-                "total_records": len(df),
-                "batch_size": batch_size,
-                "ai_recommendations": ai_result.get('optimizations', []),
-                "ai_enabled": True
-            }
-            
-        except Exception as e:
-            logger.warning(f"Failed to parse AI SQL response: {str(e)}")
-            return self._generate_basic_sql_insert(df, table_name, batch_size)
-    
-    async def _parse_and_generate_sql_update(self, response: str, df: pd.DataFrame, table_name: str, key_columns: List[str]) -> Dict[str, Any]:
-        """Parse AI response and generate SQL UPDATE statements"""
-        
-        try:
-            # Parse AI response
-            ai_result = self._parse_analysis_response(response)
-            
-            update_template = ai_result.get('update_template', '')
-            
-            # If AI didn't provide template, fall back to basic generation
-            if not update_template:
-                return self._generate_basic_sql_update(df, table_name, key_columns)
-            
-            return {
-                "update_template": update_template,
-                "key_columns": key_columns,
-                "total_records": len(df),
-                "ai_recommendations": ai_result.get('performance_tips', []),
-                "ai_enabled": True
-            }
-            
-        except Exception as e:
-            logger.warning(f"Failed to parse AI SQL response: {str(e)}")
-            return self._generate_basic_sql_update(df, table_name, key_columns)
@@ -4,11 +4,13 @@ File conversion service for Excel/CSV to JSON - Azure Functions version
 
 import pandas as pd
 import io
+import os
 import numpy as np
 import math
-import json
+import numbers
 import time
-from typing import Dict, Any, List, Optional, Union
+import datetime
+from typing import Dict, Any, List, Optional, Tuple, Union, BinaryIO
 
 from models.requests import ConversionRequest
 from services.ai_service import AIService
@@ -21,78 +23,167 @@ from utils.exceptions import (
 from core.config import get_azure_settings
 
 
+_EXCEL_EXTENSIONS = frozenset(('.xlsx', '.xls'))
+
+
+def _file_extension(filename: str) -> str:
+    """Lower-cased extension of a file name, including the dot"""
+    return os.path.splitext(filename)[1].lower()
+
+
+# SQL column type by dtype kind (signed/unsigned int, float, datetime);
+# anything else is stored as text
+_SQL_TYPE_BY_KIND = {
+    'i': "INT",
+    'u': "INT",
+    'f': "DECIMAL(18,2)",
+    'M': "DATETIME",
+}
+
+# SQL Server accepts at most 1000 row value expressions per INSERT
+_MAX_INSERT_BATCH_SIZE = 1000
+
+# How converted rows are loaded: INSERT statements, a PostgreSQL COPY with
+# inline CSV, or a SQL Server BULK INSERT over a CSV file returned alongside
+_SQL_LOAD_FORMATS = ("insert", "copy", "bulk_insert")
+
+
+def _sql_column_name(name: Any) -> str:
+    """Sanitize a column label for a bracketed SQL identifier"""
+    return str(name).replace(' ', '_').replace('-', '_')
+
+
+def _sql_value(value: Any) -> str:
+    """Render one non-null value as a SQL literal"""
+    if isinstance(value, str):
+        escaped_val = value.replace("'", "''")
+        return f"'{escaped_val}'"
+    return str(value)
+
+
+def _missing_to_none(df: pd.DataFrame, include: Optional[List[str]] = None) -> pd.DataFrame:
+    """Replace NaN/NaT left in typed columns (or only ``include`` dtypes) with None, on a shallow copy"""
+    candidates = df if include is None else df.select_dtypes(include=include)
+    has_missing = candidates.isna().any()
+    missing_columns = has_missing.index[has_missing.to_numpy()]
+    if len(missing_columns):
+        df = df.copy(deep=False)
+        missing = df[missing_columns].astype(object)
+        df[missing_columns] = missing.where(missing.notna(), None)
+    return df
+
+
+# JSON data layouts, in both directions: a list of row objects, column
+# names plus row arrays, or one array per column
+_JSON_ORIENTS = ("records", "split", "columns")
+
+
+# Column dtypes whose missing values are NaT
+_NAT_DTYPES = ['datetime', 'datetimetz', 'timedelta']
+
+
+# Cell values openpyxl writes natively; anything else (nested JSON lists and
+# objects) is written as text, as pandas' Excel writer does
+_EXCEL_NATIVE_TYPES = (str, bool, numbers.Number, datetime.date, datetime.time, datetime.timedelta)
+
+
+def _excel_value(value: Any) -> Any:
+    """Make one object-column value writable by openpyxl"""
+    if value is None or isinstance(value, _EXCEL_NATIVE_TYPES):
+        return value
+    return str(value)
+
+
 class ConverterService:
     """Service for file conversion operations - Azure Functions version"""
     
+    _instance = None
+    
+    def __new__(cls):
+        # One shared instance per worker process
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+    
     def __init__(self):
-        self.ai_service = AIService()
+        if self._initialized:
+            return
+        self._ai_service = None
         self.settings = get_azure_settings()
         self.max_file_size = self.settings.max_file_size
         self.allowed_extensions = self.settings.allowed_extensions
+        self._allowed_extension_set = frozenset(
+            ext.lower() if ext.startswith('.') else f".{ext.lower()}" for ext in self.allowed_extensions
+        )
+        self._initialized = True
         logger.info("Converter Service initialized for Azure Functions")
     
+    @property
+    def ai_service(self) -> AIService:
+        """AI service, created on the first AI-assisted conversion"""
+        if self._ai_service is None:
+            self._ai_service = AIService()
+        return self._ai_service
+    
     def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Clean DataFrame from problematic values that can't be JSON serialized
         
+        The frame is modified in place: callers pass a freshly parsed
+        DataFrame they don't reuse, so no working copy is made.
+        
         Args:
             df: Input DataFrame
             
         Returns:
-            Cleaned DataFrame
+            The same DataFrame, cleaned
         """
-        df_clean = df.copy()
+        # Each rewrite runs only when a single vectorized scan finds something
+        # to fix, so already clean frames pass straight through
         
-        # Replace inf and -inf with None
-        df_clean = df_clean.replace([np.inf, -np.inf], None)
+        # Infinities become NaN; numeric columns keep NaN and are mapped to
+        # None on export
+        float_values = df.select_dtypes(include='floating').to_numpy()
+        if float_values.size and np.isinf(float_values).any():
+            df.replace([np.inf, -np.inf], np.nan, inplace=True)
         
-        # Convert any numpy types to native Python types
-        for col in df_clean.columns:
-            if df_clean[col].dtype == 'object':
-                df_clean[col] = df_clean[col].apply(self._clean_single_value)
-            elif pd.api.types.is_numeric_dtype(df_clean[col]):
-                df_clean[col] = df_clean[col].apply(self._clean_numeric_value)
+        # Object columns hold missing values as None directly
+        object_columns = df.select_dtypes(include='object').columns
+        if len(object_columns):
+            objects = df[object_columns]
+            missing = objects.isna()
+            if missing.to_numpy().any():
+                df[object_columns] = objects.mask(missing, None)
         
-        return df_clean
-    
-    def _clean_single_value(self, value):
-        """Clean individual value for JSON serialization"""
-        if pd.isna(value):
-            return None
-        elif isinstance(value, (np.integer, np.floating)):
-            if pd.isna(value) or np.isinf(value):
-                return None
-            return value.item()
-        else:
-            return value
-    
-    def _clean_numeric_value(self, value):
-        """Clean numeric values"""
-        if pd.isna(value) or np.isinf(value):
-            return None
-        return value
+        return df
     
     async def convert_excel_to_json(
         self,
-        file_content: bytes,
+        file_content: BinaryIO,
         filename: str,
         use_ai: bool = True,
         min_confidence: float = 0.8,
         sheet_name: Optional[str] = None,
         skip_rows: int = 0,
-        max_rows: Optional[int] = None
+        max_rows: Optional[int] = None,
+        orient: str = "records"
     ) -> Dict[str, Any]:
         """
         Convert Excel/CSV file to JSON format - Azure Functions version
         
         Args:
-            file_content: File content as bytes
+            file_content: Seekable binary file object with the upload
             filename: Name of the file
             use_ai: Whether to use AI analysis
             min_confidence: Minimum confidence threshold for AI
             sheet_name: Specific sheet for Excel files
             skip_rows: Number of rows to skip
             max_rows: Maximum number of rows to process
+            orient: Data layout: "records" (one object per row), "split"
+                (column names once plus row arrays) or "columns" (one
+                array per column); the columnar layouts don't repeat every
+                key on every row, so large results are much smaller
             
         Returns:
             Conversion result with data and metadata
@@ -103,14 +194,13 @@ class ConverterService:
         try:
             logger.info(f"🔋 Processing file: {filename}")
             
-            # Validate file
-            self._validate_file_bytes(file_content, filename)
-            
-            # Process file based on type
-            df = self._process_file_bytes(filename, file_content, sheet_name, skip_rows, max_rows)
+            if orient not in _JSON_ORIENTS:
+                raise ValidationError(
+                    f"Unsupported orient: {orient}. Allowed values: {', '.join(_JSON_ORIENTS)}"
+                )
             
-            # Clean DataFrame
-            df = self._clean_dataframe(df)
+            # Validate, parse and clean the upload
+            df, file_size = self._load_and_clean(file_content, filename, sheet_name, skip_rows, max_rows)
             
             # AI analysis if requested
             ai_analysis = {}
@@ -129,7 +219,7 @@ class ConverterService:
                     ai_analysis = {"error": str(e)}
             
             # Convert to JSON
-            json_data = self._dataframe_to_json(df)
+            json_data = self._dataframe_to_json(df, orient)
             
             # Create metadata with all required fields
             processing_time = time.time() - start_time
@@ -157,7 +247,8 @@ class ConverterService:
                 }
             
             metadata = {
-                "record_count": len(json_data),
+                "record_count": len(df),
+                "orient": orient,
                 "columns": list(df.columns),
                 "ai_analysis": ai_analysis,
                 "ai_usage": ai_usage,
@@ -166,8 +257,8 @@ class ConverterService:
                 "file_info": {
                     "filename": filename,
                     "original_rows": len(df),
-                    "file_size_mb": round(len(file_content) / (1024 * 1024), 2),
-                    "sheet_name": sheet_name or "Default" if filename.lower().endswith(('.xlsx', '.xls')) else None
+                    "file_size_mb": round(file_size / (1024 * 1024), 2),
+                    "sheet_name": sheet_name or "Default" if _file_extension(filename) in _EXCEL_EXTENSIONS else None
                 }
             }
 
@@ -183,36 +274,53 @@ class ConverterService:
             logger.error(f"ERROR: Conversion failed: {str(e)}")
             raise FileProcessingError(f"Conversion failed: {str(e)}")
     
-    def _validate_file_bytes(self, file_content: bytes, filename: str) -> None:
+    def _load_and_clean(
+        self,
+        file_content: BinaryIO,
+        filename: str,
+        sheet_name: Optional[str] = None,
+        skip_rows: int = 0,
+        max_rows: Optional[int] = None
+    ) -> Tuple[pd.DataFrame, int]:
+        """
+        Validate, parse and clean an uploaded file in one pass
+        
+        Returns:
+            Cleaned DataFrame and the file size in bytes
+        """
+        file_size = self._validate_file(file_content, filename)
+        df = self._process_file(filename, file_content, sheet_name, skip_rows, max_rows)
+        return self._clean_dataframe(df), file_size
+    
+    def _validate_file(self, file_content: BinaryIO, filename: str) -> int:
         """
         Validate file content and format for Azure Functions
+        
+        Returns:
+            File size in bytes
         """
         
-        # Check file size
-        file_size = len(file_content)
+        # Check file size without reading the content
+        file_size = file_content.seek(0, io.SEEK_END)
+        file_content.seek(0)
         if file_size > self.max_file_size:
             raise ValidationError(
                 f"File size ({file_size} bytes) exceeds maximum allowed size ({self.max_file_size} bytes)"
             )
         
         # Check file extension
-        file_extension = None
-        for ext in self.allowed_extensions:
-            if filename.lower().endswith(ext):
-                file_extension = ext
-                break
-        
-        if not file_extension:
+        if _file_extension(filename) not in self._allowed_extension_set:
             raise UnsupportedFileFormatError(
                 f"File format not supported. Allowed formats: {', '.join(self.allowed_extensions)}"
             )
         
         logger.info(f"INFO: File validation passed: {filename} ({file_size} bytes)")
+        return file_size
     
-    def _process_file_bytes(
+    def _process_file(
         self, 
         filename: str, 
-        contents: bytes, 
+        contents: BinaryIO, 
         sheet_name: Optional[str] = None,
         skip_rows: int = 0,
         max_rows: Optional[int] = None
@@ -221,18 +329,18 @@ class ConverterService:
         Process file content based on file type - Azure Functions version
         """
         
-        if filename.lower().endswith('.csv'):
+        file_extension = _file_extension(filename)
+        if file_extension == '.csv':
             return self._process_csv(contents, skip_rows, max_rows)
-        elif filename.lower().endswith(('.xlsx', '.xls')):
+        elif file_extension in _EXCEL_EXTENSIONS:
             return self._process_excel(contents, sheet_name, skip_rows, max_rows)
         else:
             raise UnsupportedFileFormatError(f"Unsupported file format: {filename}")
     
-    def _process_csv(self, contents: bytes, skip_rows: int = 0, max_rows: Optional[int] = None) -> pd.DataFrame:
-        """Process CSV file from bytes"""
+    def _process_csv(self, contents: BinaryIO, skip_rows: int = 0, max_rows: Optional[int] = None) -> pd.DataFrame:
+        """Process CSV file from a binary file object"""
         try:
-            csv_io = io.StringIO(contents.decode('utf-8'))
-            df = pd.read_csv(csv_io, skiprows=skip_rows, nrows=max_rows)
+            df = pd.read_csv(contents, encoding='utf-8', skiprows=skip_rows, nrows=max_rows)
             logger.info(f"INFO: CSV data loaded: {len(df)} rows, {len(df.columns)} columns")
             return df
         except Exception as e:
@@ -241,19 +349,14 @@ class ConverterService:
     
     def _process_excel(
         self, 
-        contents: bytes, 
+        contents: BinaryIO, 
         sheet_name: Optional[str] = None,
         skip_rows: int = 0,
         max_rows: Optional[int] = None
     ) -> pd.DataFrame:
-        """Process Excel file from bytes"""
+        """Process Excel file from a binary file object"""
         try:
-            excel_io = io.BytesIO(contents)
-            
-            if sheet_name:
-                df = pd.read_excel(excel_io, sheet_name=sheet_name, skiprows=skip_rows, nrows=max_rows)
-            else:
-                df = pd.read_excel(excel_io, skiprows=skip_rows, nrows=max_rows)
+            df = pd.read_excel(contents, sheet_name=sheet_name or 0, skiprows=skip_rows, nrows=max_rows)
             
             logger.info(f"INFO: Excel data loaded: {len(df)} rows, {len(df.columns)} columns")
             return df
@@ -261,23 +364,24 @@ class ConverterService:
             logger.error(f"Excel processing failed: {str(e)}")
             raise FileProcessingError(f"Failed to process Excel file: {str(e)}")
     
-    def _dataframe_to_json(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _dataframe_to_json(
+        self, df: pd.DataFrame, orient: str = "records"
+    ) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """
         Convert DataFrame to JSON format
+        
+        Records are serialized with orjson, which writes NaN as null and
+        numpy scalars natively, so float columns are passed through as-is.
         """
         try:
-            # Convert to dict records
-            json_data = df.to_dict('records')
-            
-            # Clean the data for JSON serialization
-            cleaned_data = []
-            for record in json_data:
-                cleaned_record = {}
-                for key, value in record.items():
-                    cleaned_record[key] = self._clean_single_value(value)
-                cleaned_data.append(cleaned_record)
+            # Only NaT needs replacing: orjson would write it as the string "NaT"
+            df = _missing_to_none(df, include=_NAT_DTYPES)
             
-            return cleaned_data
+            if orient == "split":
+                return df.to_dict('split', index=False)
+            if orient == "columns":
+                return df.to_dict('list')
+            return df.to_dict('records')
             
         except Exception as e:
             logger.error(f"DataFrame to JSON conversion failed: {str(e)}")
@@ -287,55 +391,32 @@ class ConverterService:
         self, 
         json_data: Union[List[Dict], Dict], 
         filename: str = "converted_data.xlsx",
-        apply_formatting: bool = True
+        apply_formatting: bool = True,
+        orient: str = "records"
     ) -> Dict[str, Any]:
         """
         Convert JSON data to Excel format - Azure Functions version
+        
+        ``orient`` names the layout of ``json_data``, with the same values
+        Excel to JSON accepts, so columnar output can be converted back.
         """
         
         try:
             logger.info(f"🔄 Converting JSON to Excel: {filename}")
             
+            if orient not in _JSON_ORIENTS:
+                raise ValidationError(
+                    f"Unsupported orient: {orient}. Allowed values: {', '.join(_JSON_ORIENTS)}"
+                )
+            
             # Convert JSON to DataFrame
-            df = self._json_to_dataframe(json_data)
+            df = self._json_to_dataframe(json_data, orient)
             
             # Clean DataFrame
             df = self._clean_dataframe(df)
             
             # Create Excel file in memory
-            excel_buffer = io.BytesIO()
-            
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Data', index=False)
-                
-                if apply_formatting:
-                    # Apply basic formatting
-                    worksheet = writer.sheets['Data']
-                    
-                    # Header formatting
-                    from openpyxl.styles import Font, PatternFill
-                    header_font = Font(bold=True)
-                    header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-                    
-                    for col_num, value in enumerate(df.columns, 1):
-                        cell = worksheet.cell(row=1, column=col_num)
-                        cell.font = header_font
-                        cell.fill = header_fill
-                    
-                    # Auto-adjust column widths
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-            
-            excel_content = excel_buffer.getvalue()
+            excel_content = self._write_excel(df, apply_formatting)
             
             metadata = {
                 "filename": filename,
@@ -357,9 +438,101 @@ class ConverterService:
             logger.error(f"ERROR: JSON to Excel conversion failed: {str(e)}")
             raise FileProcessingError(f"JSON to Excel conversion failed: {str(e)}")
     
-    def _json_to_dataframe(self, json_data: Union[List[Dict], Dict]) -> pd.DataFrame:
-        """Convert JSON data to DataFrame"""
+    def _write_excel(self, df: pd.DataFrame, apply_formatting: bool = True) -> bytes:
+        """
+        Write a DataFrame to an .xlsx workbook in openpyxl's write-only mode
+        
+        Rows are streamed straight to the sheet instead of being held as
+        Cell objects, and column widths come from the DataFrame rather than
+        from a second pass over the written cells.
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill
+        from openpyxl.utils import get_column_letter
+        
+        df = _missing_to_none(df).copy(deep=False)
+        object_columns = df.select_dtypes(include='object').columns
+        if len(object_columns):
+            df[object_columns] = df[object_columns].map(_excel_value)
+        
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Data')
+        headers = [str(column) for column in df.columns]
+        
+        if apply_formatting:
+            # Auto-adjust column widths (must be set before any row is written)
+            for position, width in enumerate(self._excel_column_widths(df, headers), 1):
+                worksheet.column_dimensions[get_column_letter(position)].width = width
+            
+            # Header formatting
+            header_font = Font(bold=True)
+            header_fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(worksheet, value=header)
+                cell.font = header_font
+                cell.fill = header_fill
+                header_cells.append(cell)
+            worksheet.append(header_cells)
+        else:
+            worksheet.append(headers)
+        
+        for row in df.itertuples(index=False, name=None):
+            worksheet.append(row)
+        
+        excel_buffer = io.BytesIO()
+        workbook.save(excel_buffer)
+        return excel_buffer.getvalue()
+    
+    def _excel_column_widths(self, df: pd.DataFrame, headers: List[str]) -> List[int]:
+        """
+        Width per column from its longest written value or header, capped at 50
+        
+        Values are measured as the cells openpyxl receives them: empty cells
+        are skipped and datetimes keep their time part.
+        """
+        
+        widths = []
+        for position, header in enumerate(headers):
+            column = df.iloc[:, position]
+            if pd.api.types.is_integer_dtype(column.dtype) and len(column):
+                # The longest integer is always one of the extremes
+                longest = max(len(str(column.min())), len(str(column.max())))
+            elif pd.api.types.is_datetime64_any_dtype(column.dtype):
+                # astype(str) drops the time of all-midnight columns, but the
+                # cells are written as full datetimes
+                values = column.dropna()
+                longest = int(values.map(str).str.len().max()) if len(values) else 0
+            else:
+                values = column.dropna()
+                longest = int(values.astype(str).str.len().max()) if len(values) else 0
+            widths.append(min(max(len(header), longest) + 2, 50))
+        
+        return widths
+    
+    def _json_to_dataframe(
+        self, json_data: Union[List[Dict], Dict], orient: str = "records"
+    ) -> pd.DataFrame:
+        """
+        Convert JSON data to DataFrame
+        
+        With orient="records" the data is a list of records or a single
+        record. The column layouts returned by Excel to JSON are only read
+        when asked for: orient="split" ({"columns": [...], "data": [[...],
+        ...]}) and orient="columns" (one equally long array per column).
+        """
         try:
+            if orient == "split":
+                if not isinstance(json_data, dict) or not {"columns", "data"} <= json_data.keys():
+                    raise ValidationError('orient="split" data needs "columns" and "data" keys')
+                return pd.DataFrame(json_data["data"], columns=json_data["columns"])
+            
+            if orient == "columns":
+                if not isinstance(json_data, dict):
+                    raise ValidationError('orient="columns" data must be an object of column arrays')
+                return pd.DataFrame(json_data)
+            
             if isinstance(json_data, dict):
                 # If single object, convert to list
                 json_data = [json_data]
@@ -373,27 +546,37 @@ class ConverterService:
     
     async def convert_excel_to_sql(
         self,
-        file_content: bytes,
+        file_content: BinaryIO,
         filename: str,
         table_name: str = "converted_data",
         include_create_table: bool = True,
-        include_inserts: bool = True
+        include_inserts: bool = True,
+        batch_size: int = 100,
+        load_format: str = "insert"
     ) -> Dict[str, Any]:
         """
         Convert Excel file to SQL queries - Azure Functions version
+        
+        Rows are grouped into multi-row INSERT statements of ``batch_size``
+        rows each (1 to 1000); 1 gives one statement per row. With ``load_format``
+        "copy" or "bulk_insert" the rows are emitted as CSV for a single
+        bulk-load statement instead, which databases ingest far faster.
         """
         
         try:
             logger.info(f"INFO: Converting Excel to SQL: {filename} -> {table_name}")
             
-            # Validate file
-            self._validate_file_bytes(file_content, filename)
-            
-            # Process Excel file
-            df = self._process_excel(file_content)
+            if load_format not in _SQL_LOAD_FORMATS:
+                raise ValidationError(
+                    f"Unsupported load format: {load_format}. Allowed formats: {', '.join(_SQL_LOAD_FORMATS)}"
+                )
+            if not 1 <= batch_size <= _MAX_INSERT_BATCH_SIZE:
+                raise ValidationError(
+                    f"Invalid batch size: {batch_size}. Must be between 1 and {_MAX_INSERT_BATCH_SIZE}"
+                )
             
-            # Clean data
-            df = self._clean_dataframe(df)
+            # Validate, parse and clean the upload
+            df, _ = self._load_and_clean(file_content, filename)
             
             sql_queries = {}
             
@@ -402,10 +585,21 @@ class ConverterService:
                 create_table = self._generate_create_table_sql(df, table_name)
                 sql_queries["create_table"] = create_table
             
-            if include_inserts:
+            load_statements = 0
+            if include_inserts and load_format == "copy":
+                # PostgreSQL COPY with the rows inline
+                sql_queries["copy_statement"] = self._generate_copy_sql(df, table_name)
+                load_statements = 1
+            elif include_inserts and load_format == "bulk_insert":
+                # SQL Server BULK INSERT reading the CSV saved next to it
+                sql_queries["bulk_insert_statement"] = self._generate_bulk_insert_sql(table_name)
+                sql_queries["csv_data"] = self._dataframe_to_csv(df)
+                load_statements = 1
+            elif include_inserts:
                 # Generate INSERT statements
-                insert_statements = self._generate_insert_sql(df, table_name)
+                insert_statements = self._generate_insert_sql(df, table_name, batch_size)
                 sql_queries["insert_statements"] = insert_statements
+                load_statements = len(insert_statements)
             
             metadata = {
                 "table_name": table_name,
@@ -413,7 +607,10 @@ class ConverterService:
                 "columns": len(df.columns),
                 "create_table_included": include_create_table,
                 "inserts_included": include_inserts,
-                "total_statements": (1 if include_create_table else 0) + (len(insert_statements) if include_inserts else 0)
+                "insert_batch_size": batch_size,
+                "load_format": load_format,
+                "total_statements": (1 if include_create_table else 0) + load_statements,
+                "recommended_ingest": self._recommended_ingest(len(df.columns))
             }
             
             logger.info(f"✅ Excel to SQL conversion completed: {metadata['total_statements']} statements")
@@ -427,54 +624,91 @@ class ConverterService:
             logger.error(f"ERROR: Excel to SQL conversion failed: {str(e)}")
             raise FileProcessingError(f"Excel to SQL conversion failed: {str(e)}")
     
+    def _recommended_ingest(self, column_count: int) -> Dict[str, Any]:
+        """
+        Client-side settings for loading these rows quickly
+        
+        For SQLAlchemy with pyodbc, fast_executemany is passed to
+        create_engine(..., fast_executemany=True) or set on the cursor from
+        a "before_cursor_execute" event listener. The pandas chunksize keeps
+        method="multi" under SQL Server's 2100-parameter limit per statement.
+        """
+        return {
+            "pyodbc": {"fast_executemany": True},
+            "pandas_to_sql": {
+                "method": "multi",
+                "chunksize": max(1, min(_MAX_INSERT_BATCH_SIZE, 2099 // max(column_count, 1)))
+            },
+            "postgres": {"use_copy_from_stdin": True, "load_format": "copy"},
+            "sql_server": {"load_format": "bulk_insert"}
+        }
+    
     def _generate_create_table_sql(self, df: pd.DataFrame, table_name: str) -> str:
         """Generate CREATE TABLE SQL statement from DataFrame"""
         
         columns = []
         for col_name, dtype in df.dtypes.items():
             # Sanitize column name
-            safe_col_name = col_name.replace(' ', '_').replace('-', '_')
+            safe_col_name = _sql_column_name(col_name)
             
             # Map pandas dtype to SQL type
-            if pd.api.types.is_integer_dtype(dtype):
-                sql_type = "INT"
-            elif pd.api.types.is_float_dtype(dtype):
-                sql_type = "DECIMAL(18,2)"
-            elif pd.api.types.is_datetime64_any_dtype(dtype):
-                sql_type = "DATETIME"
-            else:
-                sql_type = "NVARCHAR(255)"
+            sql_type = _SQL_TYPE_BY_KIND.get(dtype.kind, "NVARCHAR(255)")
             
             columns.append(f"    [{safe_col_name}] {sql_type}")
         
+        column_definitions = ",\n".join(columns)
         create_table_sql = f"""CREATE TABLE [{table_name}] (
-{chr(10).join(columns)}
+{column_definitions}
 );"""
         
         return create_table_sql
     
-    def _generate_insert_sql(self, df: pd.DataFrame, table_name: str) -> List[str]:
-        """Generate INSERT SQL statements from DataFrame"""
-        
-        # Sanitize column names
-        safe_columns = [col.replace(' ', '_').replace('-', '_') for col in df.columns]
-        columns_str = ', '.join([f'[{col}]' for col in safe_columns])
-        
-        insert_statements = []
-        
-        for _, row in df.iterrows():
-            values = []
-            for val in row:
-                if pd.isna(val):
-                    values.append("NULL")
-                elif isinstance(val, str):
-                    escaped_val = val.replace("'", "''")
-                    values.append(f"'{escaped_val}'")
-                else:
-                    values.append(str(val))
-            
-            values_str = ', '.join(values)
-            insert_sql = f"INSERT INTO [{table_name}] ({columns_str}) VALUES ({values_str});"
-            insert_statements.append(insert_sql)
+    def _generate_insert_sql(self, df: pd.DataFrame, table_name: str, batch_size: int = 100) -> List[str]:
+        """Generate multi-row INSERT SQL statements from DataFrame, ``batch_size`` rows each"""
+        
+        # Sanitize column names once for the shared statement prefix
+        columns_str = ', '.join([f'[{_sql_column_name(col)}]' for col in df.columns])
+        
+        statement_prefix = f"INSERT INTO [{table_name}] ({columns_str}) VALUES\n"
+        
+        # Format whole columns at once, then stitch each row's literals together
+        literal_columns = [self._sql_literals(df.iloc[:, position]) for position in range(df.shape[1])]
+        row_values = [f"({', '.join(values)})" for values in zip(*literal_columns)]
+        
+        insert_statements = [
+            statement_prefix + ",\n".join(row_values[start:start + batch_size]) + ";"
+            for start in range(0, len(row_values), batch_size)
+        ]
         
         return insert_statements
+    
+    def _dataframe_to_csv(self, df: pd.DataFrame) -> str:
+        """Render rows as headerless CSV; missing values become empty (NULL) fields"""
+        return df.to_csv(index=False, header=False, lineterminator='\n')
+    
+    def _generate_copy_sql(self, df: pd.DataFrame, table_name: str) -> str:
+        """Generate a PostgreSQL COPY ... FROM STDIN statement carrying the rows as CSV"""
+        
+        columns_str = ', '.join([f'"{_sql_column_name(col)}"' for col in df.columns])
+        return (
+            f'COPY "{table_name}" ({columns_str}) FROM STDIN WITH (FORMAT csv);\n'
+            f"{self._dataframe_to_csv(df)}\\.\n"
+        )
+    
+    def _generate_bulk_insert_sql(self, table_name: str) -> str:
+        """Generate a SQL Server BULK INSERT for the CSV returned as ``csv_data``"""
+        return f"BULK INSERT [{table_name}] FROM '{table_name}.csv' WITH (FORMAT = 'CSV');"
+    
+    def _sql_literals(self, column: pd.Series) -> np.ndarray:
+        """Render a column as SQL literals: NULL, quoted/escaped text or plain values"""
+        
+        missing = column.isna().to_numpy()
+        if pd.api.types.is_numeric_dtype(column.dtype):
+            literals = column.astype(str)
+        elif pd.api.types.infer_dtype(column, skipna=True) == 'string':
+            literals = "'" + column.str.replace("'", "''", regex=False) + "'"
+        else:
+            # Mixed columns: only the text values are quoted
+            literals = column.map(_sql_value, na_action='ignore')
+        
+        return np.where(missing, "NULL", literals.to_numpy(dtype=object))
@@ -0,0 +1,55 @@
+"""
+In-memory cache of Azure OpenAI responses keyed by deployment and prompt
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+
+class PromptCache:
+    """Bounded LRU of model responses with a time-to-live per entry"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+
+    @staticmethod
+    def _key(deployment: str, prompt: str) -> Tuple[str, str]:
+        """Cache key: deployment name plus SHA-256 of the prompt text"""
+        return deployment, hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+    def get(self, deployment: str, prompt: str) -> Optional[str]:
+        """Return the cached response for a prompt, or None if absent/expired"""
+        if self.max_entries <= 0:
+            return None
+
+        key = self._key(deployment, prompt)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, response = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, deployment: str, prompt: str, response: str) -> None:
+        """Store a response, evicting the least recently used beyond the bound"""
+        if self.max_entries <= 0:
+            return
+
+        key = self._key(deployment, prompt)
+        self._entries[key] = (time.monotonic(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached response"""
+        self._entries.clear()
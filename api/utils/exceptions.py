@@ -5,6 +5,8 @@ Custom exceptions for the application
 from fastapi import HTTPException
 from typing import Optional, Any, Dict
 
+from utils.timestamps import utc_now_iso
+
 
 class ConverterBaseException(Exception):
     """Base exception for converter-related errors"""
@@ -36,6 +38,16 @@ class AIProcessingError(ConverterBaseException):
     pass
 
 
+class AITransientError(AIProcessingError):
+    """Raised when an Azure OpenAI call fails in a way worth retrying"""
+    pass
+
+
+class AIRateLimitError(AITransientError):
+    """Raised when an Azure OpenAI deployment rejects a call with HTTP 429"""
+    pass
+
+
 class ValidationError(ConverterBaseException):
     """Raised when validation fails"""
     pass
@@ -63,7 +75,7 @@ def create_http_exception(
     detail = {
         "error": message,
         "status": "ERROR",
-        "timestamp": "2025-09-05T11:00:00Z"
+        "timestamp": utc_now_iso()
     }
     
     if error_code:
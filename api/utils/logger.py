@@ -20,10 +20,25 @@ class ColoredFormatter(logging.Formatter):
         'ENDC': '\033[0m'       # End color
     }
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Colored level names, built once instead of on every record
+        end_color = self.COLORS['ENDC']
+        self._colored_levelnames = {
+            level: f"{color}{level}{end_color}"
+            for level, color in self.COLORS.items()
+            if level != 'ENDC'
+        }
+    
     def format(self, record):
-        log_color = self.COLORS.get(record.levelname, self.COLORS['ENDC'])
-        record.levelname = f"{log_color}{record.levelname}{self.COLORS['ENDC']}"
-        return super().format(record)
+        # The record is shared with every other handler, so its level name
+        # is only colored while this formatter renders it
+        levelname = record.levelname
+        record.levelname = self._colored_levelnames.get(levelname, levelname)
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
 
 
 def setup_logger(
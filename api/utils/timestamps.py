@@ -0,0 +1,30 @@
+"""
+Cached UTC timestamps for API responses
+"""
+
+import time
+from datetime import datetime, timezone
+
+
+# (epoch second, formatted string) of the last timestamp handed out
+_last_timestamp = (0, "")
+
+
+def utc_now_iso() -> str:
+    """
+    Get the current UTC time as an ISO 8601 string
+    
+    The string is formatted at most once per second and reused in between,
+    which is the resolution response timestamps need.
+    
+    Returns:
+        Timestamp like ``2025-09-05T11:00:00Z``
+    """
+    global _last_timestamp
+    
+    now = int(time.time())
+    cached_second, cached_value = _last_timestamp
+    if now != cached_second:
+        cached_value = datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        _last_timestamp = (now, cached_value)
+    return cached_value